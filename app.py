@@ -3,26 +3,85 @@ import logging
 from flask import Flask, jsonify
 from flask_sqlalchemy import SQLAlchemy
 from flask_cors import CORS
+from sqlalchemy import inspect, text
 from sqlalchemy.orm import DeclarativeBase
 from werkzeug.middleware.proxy_fix import ProxyFix
-
-# Configure logging
-logging.basicConfig(level=logging.DEBUG)
+from replicas import RoutingSession, init_replicas
+from http_cache import init_cache_invalidation
 
 class Base(DeclarativeBase):
     pass
 
-db = SQLAlchemy(model_class=Base)
+db = SQLAlchemy(model_class=Base, session_options={"class_": RoutingSession})
+init_cache_invalidation(RoutingSession)
+
+def configure_logging():
+    """Configure root logging once, at LOG_LEVEL (DEBUG in development, INFO otherwise)"""
+    default_level = "DEBUG" if os.environ.get("FLASK_ENV") == "development" else "INFO"
+    logging.basicConfig(level=os.environ.get("LOG_LEVEL", default_level).upper())
+
+def upgrade_schema():
+    """Add columns and indexes that models gained after their tables were created.
+
+    ``create_all`` only creates missing tables. New columns must be nullable or
+    have a server default so existing rows stay valid. Returns the changes made.
+    """
+    engine = db.engine
+    preparer = engine.dialect.identifier_preparer
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    changes = []
+    with engine.begin() as connection:
+        for table in db.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            columns = {column['name'] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in columns:
+                    continue
+                if not column.nullable and column.server_default is None:
+                    raise RuntimeError(f"Cannot add NOT NULL column {table.name}.{column.name} without a server default")
+                ddl = f"ALTER TABLE {preparer.format_table(table)} ADD COLUMN {preparer.format_column(column)} " \
+                      f"{column.type.compile(engine.dialect)}"
+                for foreign_key in column.foreign_keys:
+                    target = foreign_key.column
+                    ddl += f" REFERENCES {preparer.format_table(target.table)} ({preparer.format_column(target)})"
+                connection.execute(text(ddl))
+                changes.append(f"added column {table.name}.{column.name}")
+
+            indexes = {index['name'] for index in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name not in indexes:
+                    index.create(connection)
+                    changes.append(f"created index {index.name}")
+    return changes
+
+def init_db(app):
+    """Create missing tables, columns and indexes; run via `flask --app main init-db` rather than on every boot"""
+    with app.app_context():
+        import models
+        db.create_all()
+        changes = upgrade_schema()
+        for change in changes:
+            logging.info(f"Schema upgrade: {change}")
+        return changes
 
 def create_app():
+    configure_logging()
     app = Flask(__name__)
     
     # Configure CORS to allow requests from your frontend
     # This is crucial for the frontend to be able to communicate with the backend
-    CORS(app, resources={r"/api/*": {"origins": ["http://localhost:3000", "https://*.vercel.app"]}})
+    # Credentials are allowed so the session cookie that pins reads to the primary after a write
+    # (see replicas.py) travels with cross-origin requests
+    CORS(app, resources={r"/api/*": {"origins": ["http://localhost:3000", r"https://[\w-]+\.vercel\.app"]}},
+         supports_credentials=True)
     
     # Configure app
     app.secret_key = os.environ.get("SESSION_SECRET", "dev-secret-key-change-in-production")
+    # Cross-site requests only carry cookies marked SameSite=None, which browsers require to be Secure
+    app.config["SESSION_COOKIE_SAMESITE"] = "None"
+    app.config["SESSION_COOKIE_SECURE"] = True
     app.wsgi_app = ProxyFix(app.wsgi_app, x_proto=1, x_host=1)
     
     # Database configuration
@@ -37,10 +96,17 @@ def create_app():
     # Initialize extensions
     db.init_app(app)
     
+    # Optional read replicas for read-only endpoints
+    init_replicas(app, os.environ.get("DATABASE_READ_URLS", ""))
+    
     # Register blueprints
     from routes import api_bp
     app.register_blueprint(api_bp)
     
+    # Register maintenance commands
+    from cli import register_commands
+    register_commands(app)
+    
     # Root endpoint for API documentation
     @app.route('/')
     def root():
@@ -61,12 +127,9 @@ def create_app():
             'documentation': 'See README.md for detailed API documentation'
         })
     
-    # Create tables
-    with app.app_context():
-        import models
-        db.create_all()
+    # Opt-in for single-process setups that cannot run the init command
+    if os.environ.get("AUTO_CREATE_TABLES", "").lower() in ("1", "true", "yes"):
+        init_db(app)
     
     return app
 
-# Create the app instance
-app = create_app()
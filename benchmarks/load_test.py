@@ -0,0 +1,285 @@
+"""Load-test the SQLSense API against a local mock OpenRouter server.
+
+Starts the mock server and the Flask app in-process, drives the main
+endpoints at a fixed concurrency and reports throughput, p50/p95/p99 latency
+and time spent in the database per endpoint. Results can be written as JSON
+and compared with a previous run to spot regressions between commits.
+
+    python benchmarks/load_test.py --requests 200 --concurrency 16 --output bench.json
+    python benchmarks/load_test.py --compare bench.json --max-regression 10
+"""
+import argparse
+import json
+import logging
+import math
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.mock_openrouter import MockSettings, start_mock_server  # noqa: E402
+
+ENDPOINTS: Dict[str, Callable[[int], Dict[str, Any]]] = {
+    "generate_sql": lambda i: {
+        "method": "POST", "path": "/api/generate-sql",
+        "json": {"prompt": f"list customers who ordered product {i}", "database_type": "postgresql"}
+    },
+    "generate_schema": lambda i: {
+        "method": "POST", "path": "/api/generate-schema",
+        "json": {"description": f"an online store with {i % 10 + 1} product categories", "name": f"Bench {i}"}
+    },
+    "chat": lambda i: {
+        "method": "POST", "path": "/api/chat",
+        "json": {"message": f"How can I make query {i} faster?", "type": "general"}
+    },
+    "history": lambda i: {
+        "method": "GET", "path": "/api/history", "params": {"page": i % 5 + 1, "per_page": 10}
+    },
+    "analytics": lambda i: {
+        "method": "GET", "path": "/api/analytics"
+    },
+}
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an unsorted list"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(math.ceil(pct / 100.0 * len(ordered)) - 1, 0)
+    return ordered[min(rank, len(ordered) - 1)]
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except Exception:
+        return None
+
+
+def _install_db_timer(app, db):
+    """Expose per-request database time through an ``X-DB-Time-Ms`` header"""
+    from sqlalchemy import event
+
+    local = threading.local()
+
+    with app.app_context():
+        engine = db.engine
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        local.started = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        local.total = getattr(local, "total", 0.0) + time.perf_counter() - local.started
+
+    @app.before_request
+    def _reset_db_timer():
+        local.total = 0.0
+
+    @app.after_request
+    def _report_db_timer(response):
+        response.headers["X-DB-Time-Ms"] = f"{getattr(local, 'total', 0.0) * 1000:.3f}"
+        return response
+
+
+def start_app_server(database_url: str, openrouter_url: str):
+    """Import the Flask app against the benchmark database and serve it on a thread"""
+    os.environ["DATABASE_URL"] = database_url
+    os.environ["OPENROUTER_BASE_URL"] = openrouter_url
+    os.environ.setdefault("OPENROUTER_API_KEY", "mock-key")
+
+    from werkzeug.serving import make_server
+    from app import db, init_db
+    from main import app
+
+    init_db(app)
+
+    _install_db_timer(app, db)
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+
+def run_endpoint(client: httpx.Client, name: str, requests: int, concurrency: int) -> Dict[str, Any]:
+    """Send ``requests`` calls to one endpoint and summarise the timings"""
+    build = ENDPOINTS[name]
+    latencies: List[float] = []
+    db_times: List[float] = []
+    errors = 0
+    lock = threading.Lock()
+
+    def call(i: int):
+        nonlocal errors
+        spec = build(i)
+        started = time.perf_counter()
+        try:
+            response = client.request(spec["method"], spec["path"], json=spec.get("json"), params=spec.get("params"))
+            elapsed = time.perf_counter() - started
+            db_ms = float(response.headers.get("X-DB-Time-Ms", 0.0))
+            failed = response.status_code >= 400
+        except httpx.HTTPError:
+            elapsed = time.perf_counter() - started
+            db_ms = 0.0
+            failed = True
+        with lock:
+            latencies.append(elapsed * 1000)
+            db_times.append(db_ms)
+            if failed:
+                errors += 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(call, range(requests)))
+    wall = time.perf_counter() - started
+
+    return {
+        "requests": requests,
+        "errors": errors,
+        "error_rate": errors / requests if requests else 0.0,
+        "throughput_rps": requests / wall if wall else 0.0,
+        "latency_ms": {
+            "p50": percentile(latencies, 50),
+            "p95": percentile(latencies, 95),
+            "p99": percentile(latencies, 99),
+            "mean": sum(latencies) / len(latencies) if latencies else 0.0,
+        },
+        "db_time_ms": {
+            "mean": sum(db_times) / len(db_times) if db_times else 0.0,
+            "p95": percentile(db_times, 95),
+            "total": sum(db_times),
+        },
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], max_regression: float) -> bool:
+    """Print p95 and throughput deltas; return False if any exceeds ``max_regression`` percent"""
+    ok = True
+    print(f"\nComparison against {baseline.get('meta', {}).get('commit') or 'baseline'}:")
+    for name, result in current["endpoints"].items():
+        old = baseline.get("endpoints", {}).get(name)
+        if not old:
+            continue
+        old_p95 = old["latency_ms"]["p95"]
+        new_p95 = result["latency_ms"]["p95"]
+        p95_delta = (new_p95 - old_p95) / old_p95 * 100 if old_p95 else 0.0
+        old_rps = old["throughput_rps"]
+        rps_delta = (result["throughput_rps"] - old_rps) / old_rps * 100 if old_rps else 0.0
+        regressed = p95_delta > max_regression or -rps_delta > max_regression
+        ok = ok and not regressed
+        flag = "REGRESSION" if regressed else "ok"
+        print(f"  {name:<16} p95 {p95_delta:+7.1f}%  throughput {rps_delta:+7.1f}%  {flag}")
+    return ok
+
+
+def print_report(results: Dict[str, Any]):
+    print(f"\n{'endpoint':<16} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'db ms':>8} {'errors':>7}")
+    for name, result in results["endpoints"].items():
+        latency = result["latency_ms"]
+        print(
+            f"{name:<16} {result['throughput_rps']:>9.1f} {latency['p50']:>9.2f} {latency['p95']:>9.2f} "
+            f"{latency['p99']:>9.2f} {result['db_time_ms']['mean']:>8.2f} {result['errors']:>7}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark SQLSense API endpoints")
+    parser.add_argument("--database-url", help="Database to run against (defaults to a temporary SQLite file)")
+    parser.add_argument("--endpoints", default=",".join(ENDPOINTS), help="Comma-separated endpoints to drive")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--warmup", type=int, default=5, help="Unmeasured requests per endpoint")
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="Mock OpenRouter latency")
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of mock calls that fail")
+    parser.add_argument("--output", help="Write machine-readable results to this JSON file")
+    parser.add_argument("--compare", help="Baseline JSON results to compare against")
+    parser.add_argument("--max-regression", type=float, default=10.0,
+                        help="Percent p95/throughput regression that fails --compare")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    names = [name.strip() for name in args.endpoints.split(",") if name.strip()]
+    unknown = [name for name in names if name not in ENDPOINTS]
+    if unknown:
+        parser.error(f"Unknown endpoints: {', '.join(unknown)}")
+
+    database_url = args.database_url
+    if not database_url:
+        handle, path = tempfile.mkstemp(prefix="sqlsense-bench-", suffix=".db")
+        os.close(handle)
+        database_url = f"sqlite:///{path}"
+
+    settings = MockSettings(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate
+    )
+    mock_server, mock_url = start_mock_server(settings=settings)
+    app_server, base_url = start_app_server(database_url, mock_url)
+
+    results: Dict[str, Any] = {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": datetime.utcnow().isoformat(),
+            "python": platform.python_version(),
+            "database": database_url.split("://", 1)[0],
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "mock": {
+                "latency_ms": args.latency_ms,
+                "jitter_ms": args.jitter_ms,
+                "error_rate": args.error_rate,
+            },
+        },
+        "endpoints": {},
+    }
+
+    try:
+        limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+        with httpx.Client(base_url=base_url, timeout=60.0, limits=limits) as client:
+            for name in names:
+                if args.warmup:
+                    run_endpoint(client, name, args.warmup, min(args.warmup, args.concurrency))
+                results["endpoints"][name] = run_endpoint(client, name, args.requests, args.concurrency)
+    finally:
+        app_server.shutdown()
+        mock_server.shutdown()
+
+    results["meta"]["mock"]["calls"] = settings.requests
+    results["meta"]["mock"]["injected_errors"] = settings.errors
+
+    print_report(results)
+
+    if args.output:
+        with open(args.output, "w") as handle:
+            json.dump(results, handle, indent=2)
+        print(f"\nResults written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as handle:
+            baseline = json.load(handle)
+        if not compare(results, baseline, args.max_regression):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+"""Local stand-in for the OpenRouter chat-completions API.
+
+Used by the benchmark harness so load tests never hit the real API. Latency,
+error rate and streaming behaviour are configurable from the command line or
+when embedding the server via ``start_mock_server``.
+"""
+import argparse
+import json
+import logging
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional, Tuple
+
+SQL_CONTENT = json.dumps({
+    "sql_query": "SELECT id, name FROM customers WHERE created_at >= NOW() - INTERVAL '30 days';",
+    "explanation": "Customers created in the last 30 days",
+    "tables_involved": ["customers"]
+})
+
+SCHEMA_CONTENT = json.dumps({
+    "schema": "CREATE TABLE customers (\n  id SERIAL PRIMARY KEY,\n  name VARCHAR(200) NOT NULL\n);",
+    "explanation": "A single customers table",
+    "tables": [{"name": "customers", "columns": ["id", "name"]}],
+    "recommendations": []
+})
+
+CHAT_CONTENT = "Add an index on the columns used in your WHERE clause and avoid SELECT *."
+
+
+class MockSettings:
+    """Runtime behaviour of the mock server"""
+
+    def __init__(self, latency_ms: float = 50.0, jitter_ms: float = 0.0,
+                 error_rate: float = 0.0, stream_chunks: int = 8,
+                 stream_delay_ms: float = 5.0, seed: Optional[int] = None):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.stream_chunks = stream_chunks
+        self.stream_delay_ms = stream_delay_ms
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+
+    def next_delay(self) -> float:
+        """Seconds to wait before answering a request"""
+        with self.lock:
+            jitter = self.random.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0.0
+        return max(self.latency_ms + jitter, 0.0) / 1000.0
+
+    def should_fail(self) -> bool:
+        """Record a request and decide whether it gets an injected error"""
+        with self.lock:
+            self.requests += 1
+            failed = self.random.random() < self.error_rate
+            if failed:
+                self.errors += 1
+            return failed
+
+
+def _pick_content(messages: list) -> str:
+    """Choose a canned answer matching the generator that sent the prompt"""
+    system = messages[0].get("content", "") if messages else ""
+    if "database design expert" in system:
+        return SCHEMA_CONTENT
+    if "SQL expert" in system:
+        return SQL_CONTENT
+    return CHAT_CONTENT
+
+
+def _completion(model: str, content: str) -> Dict[str, Any]:
+    """Build a non-streaming chat-completions response body"""
+    return {
+        "id": f"mock-{int(time.time() * 1000)}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": content},
+            "finish_reason": "stop"
+        }],
+        "usage": {
+            "prompt_tokens": 0,
+            "completion_tokens": len(content.split()),
+            "total_tokens": len(content.split())
+        }
+    }
+
+
+class MockOpenRouterHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    settings: MockSettings = MockSettings()
+
+    def log_message(self, format, *args):
+        logging.debug("mock-openrouter: " + format, *args)
+
+    def _send_json(self, status: int, body: Dict[str, Any]):
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _send_stream(self, model: str, content: str):
+        """Send the answer as server-sent events, split into chunks"""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+
+        chunks = max(self.settings.stream_chunks, 1)
+        size = max(len(content) // chunks, 1)
+        for start in range(0, len(content), size):
+            event = {
+                "id": "mock-stream",
+                "object": "chat.completion.chunk",
+                "model": model,
+                "choices": [{"index": 0, "delta": {"content": content[start:start + size]}}]
+            }
+            self.wfile.write(f"data: {json.dumps(event)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+            time.sleep(self.settings.stream_delay_ms / 1000.0)
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+        self.close_connection = True
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except json.JSONDecodeError:
+            self._send_json(400, {"error": {"message": "Invalid JSON body"}})
+            return
+
+        time.sleep(self.settings.next_delay())
+
+        if self.settings.should_fail():
+            self._send_json(503, {"error": {"message": "Injected mock failure", "code": 503}})
+            return
+
+        model = body.get("model", "mock-model")
+        content = _pick_content(body.get("messages", []))
+        if body.get("stream"):
+            self._send_stream(model, content)
+        else:
+            self._send_json(200, _completion(model, content))
+
+
+def start_mock_server(host: str = "127.0.0.1", port: int = 0,
+                      settings: Optional[MockSettings] = None) -> Tuple[ThreadingHTTPServer, str]:
+    """Start the mock server on a background thread.
+
+    Returns the server (call ``shutdown()`` when done) and the
+    chat-completions URL to put in ``OPENROUTER_BASE_URL``.
+    """
+    handler = type("BoundMockHandler", (MockOpenRouterHandler,), {"settings": settings or MockSettings()})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    bound_host, bound_port = server.server_address[:2]
+    return server, f"http://{bound_host}:{bound_port}/api/v1/chat/completions"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a mock OpenRouter chat-completions server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--stream-chunks", type=int, default=8)
+    parser.add_argument("--stream-delay-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    settings = MockSettings(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        stream_chunks=args.stream_chunks,
+        stream_delay_ms=args.stream_delay_ms
+    )
+    server, url = start_mock_server(args.host, args.port, settings)
+    logging.info(f"Mock OpenRouter listening at {url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
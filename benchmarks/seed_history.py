@@ -0,0 +1,155 @@
+"""Seed the history tables with synthetic rows for read-path benchmarks.
+
+Rows are written with batched Core inserts so millions of rows can be loaded
+in a few minutes. Point ``--database-url`` at a scratch database; the script
+never deletes existing data.
+
+    python benchmarks/seed_history.py --database-url sqlite:///bench.db --rows 1000000
+"""
+import argparse
+import logging
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+PROMPTS = [
+    "list all customers who signed up last month",
+    "total revenue per product category",
+    "top 10 employees by sales this quarter",
+    "orders that have not shipped yet",
+    "average order value by country",
+    "users with more than five failed logins",
+    "monthly active users for the past year",
+    "products that are out of stock",
+]
+
+DATABASE_TYPES = ["postgresql", "mysql", "sqlite"]
+
+
+def _history_rows(start: int, count: int, rng: random.Random, now: datetime):
+    rows = []
+    for offset in range(count):
+        prompt = rng.choice(PROMPTS)
+        rows.append({
+            "natural_query": f"{prompt} #{start + offset}",
+            "generated_sql": f"SELECT * FROM seeded_table_{offset % 50} LIMIT {offset % 100 + 1};",
+            "database_type": rng.choice(DATABASE_TYPES),
+            "explanation": "Seeded row for benchmarking",
+            "model_used": "mock-model",
+            "context": "",
+            "created_at": now - timedelta(seconds=rng.randint(0, 365 * 24 * 3600)),
+            "is_favorite": rng.random() < 0.05,
+        })
+    return rows
+
+
+def seed(database_url: str, rows: int, batch_size: int = 10000, versions_per_query: float = 0.2,
+         chat_rows: int = 0, schema_rows: int = 0, seed_value: int = 42):
+    """Insert ``rows`` query history entries plus related events and versions"""
+    os.environ["DATABASE_URL"] = database_url
+
+    from sqlalchemy import func, insert
+    from app import db, init_db
+    from main import app
+    from models import QueryHistory, AnalyticsEvent, QueryVersion, ChatMessage, SchemaVersion
+
+    init_db(app)
+
+    rng = random.Random(seed_value)
+    now = datetime.utcnow()
+    started = time.perf_counter()
+
+    with app.app_context():
+        start = db.session.query(func.count(QueryHistory.id)).scalar() + 1
+        inserted = 0
+        while inserted < rows:
+            count = min(batch_size, rows - inserted)
+            history = _history_rows(start + inserted, count, rng, now)
+            # Let the database assign ids so PostgreSQL sequences stay in step
+            ids = db.session.execute(
+                insert(QueryHistory).returning(QueryHistory.id, sort_by_parameter_order=True), history
+            ).scalars().all()
+            for row, query_id in zip(history, ids):
+                row["id"] = query_id
+
+            events = [
+                {"event_type": "generate_sql", "query_history_id": row["id"], "created_at": row["created_at"]}
+                for row in history
+            ]
+            db.session.execute(insert(AnalyticsEvent), events)
+
+            versions = [
+                {
+                    "query_history_id": row["id"],
+                    "generated_sql": row["generated_sql"],
+                    "version_message": "Seeded version",
+                    "created_at": row["created_at"],
+                }
+                for row in history if rng.random() < versions_per_query
+            ]
+            if versions:
+                db.session.execute(insert(QueryVersion), versions)
+
+            db.session.commit()
+            inserted += count
+            logging.info(f"Seeded {inserted}/{rows} query history rows")
+
+        for start in range(0, chat_rows, batch_size):
+            count = min(batch_size, chat_rows - start)
+            messages = [
+                {
+                    "message": f"How do I speed up query {start + i}?",
+                    "response": "Add an index on the filtered columns.",
+                    "message_type": "general",
+                    "created_at": now - timedelta(seconds=rng.randint(0, 365 * 24 * 3600)),
+                }
+                for i in range(count)
+            ]
+            db.session.execute(insert(ChatMessage), messages)
+            db.session.commit()
+
+        for start in range(0, schema_rows, batch_size):
+            count = min(batch_size, schema_rows - start)
+            schemas = [
+                {
+                    "name": f"Seeded schema {start + i}",
+                    "description": "Seeded schema for benchmarking",
+                    "schema_ddl": "CREATE TABLE seeded (id INTEGER PRIMARY KEY);",
+                    "database_type": rng.choice(DATABASE_TYPES),
+                    "explanation": "",
+                    "tables_info": "[]",
+                    "version": 1,
+                    "created_at": now - timedelta(seconds=rng.randint(0, 365 * 24 * 3600)),
+                    "is_active": True,
+                }
+                for i in range(count)
+            ]
+            db.session.execute(insert(SchemaVersion), schemas)
+            db.session.commit()
+
+    logging.info(f"Seeding finished in {time.perf_counter() - started:.1f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Seed SQLSense history tables with synthetic rows")
+    parser.add_argument("--database-url", default=os.environ.get("DATABASE_URL", "sqlite:///sqlsense_bench.db"))
+    parser.add_argument("--rows", type=int, default=100000, help="Number of query history rows")
+    parser.add_argument("--batch-size", type=int, default=10000)
+    parser.add_argument("--versions-per-query", type=float, default=0.2,
+                        help="Fraction of history rows that get a saved version")
+    parser.add_argument("--chat-rows", type=int, default=0)
+    parser.add_argument("--schema-rows", type=int, default=0)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    seed(args.database_url, args.rows, args.batch_size, args.versions_per_query,
+         args.chat_rows, args.schema_rows, args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""Measure cold-start cost: importing the WSGI entry point and the first requests.
+
+Each run happens in a fresh interpreter so module caches do not hide import
+work. Reported per phase as median and max over all runs.
+
+    python benchmarks/startup_time.py --runs 10 --output startup.json
+
+Tables are created first (``flask init-db``) so the first requests are real
+ones; the run fails if any of them does not return 200.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs inside the child interpreter and prints one JSON line of timings in ms
+CHILD = r"""
+import json, sys, time
+started = time.perf_counter()
+import main
+imported = time.perf_counter()
+client = main.app.test_client()
+timings = {"import_ms": (imported - started) * 1000}
+for name, path in PATHS:
+    before = time.perf_counter()
+    status = client.get(path).status_code
+    timings[name + "_ms"] = (time.perf_counter() - before) * 1000
+    timings[name + "_status"] = status
+timings["total_ms"] = (time.perf_counter() - started) * 1000
+print("STARTUP " + json.dumps(timings))
+"""
+
+PATHS = [
+    ("first_health", "/api/health"),
+    ("first_history", "/api/history"),
+]
+
+
+def run_once(env) -> dict:
+    code = f"PATHS = {PATHS!r}\n" + CHILD
+    output = subprocess.run(
+        [sys.executable, "-c", code], cwd=ROOT, env=env,
+        capture_output=True, text=True, check=True
+    ).stdout
+    for line in output.splitlines():
+        if line.startswith("STARTUP "):
+            return json.loads(line[len("STARTUP "):])
+    raise RuntimeError("Child process did not report timings")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark SQLSense import and first-request latency")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--database-url", help="Database to start against (defaults to a fresh SQLite file)")
+    parser.add_argument("--skip-init-db", action="store_true",
+                        help="Do not create or upgrade tables before measuring")
+    parser.add_argument("--output", help="Write machine-readable results to this JSON file")
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    if args.database_url:
+        env["DATABASE_URL"] = args.database_url
+    else:
+        handle, path = tempfile.mkstemp(prefix="sqlsense-startup-", suffix=".db")
+        os.close(handle)
+        env["DATABASE_URL"] = f"sqlite:///{path}"
+
+    if not args.skip_init_db:
+        subprocess.run([sys.executable, "-m", "flask", "--app", "main", "init-db"], cwd=ROOT, env=env,
+                       check=True, capture_output=True)
+
+    runs = [run_once(env) for _ in range(args.runs)]
+    failed = sorted({key for run in runs for key, value in run.items() if key.endswith("_status") and value != 200})
+    if failed:
+        # Timings of error responses say nothing about a real first request
+        print(f"Error: non-200 responses for {', '.join(failed)}; is the database initialized?", file=sys.stderr)
+        sys.exit(1)
+    phases = [key for key in runs[0] if key.endswith("_ms")]
+    summary = {
+        phase: {
+            "median": statistics.median(run[phase] for run in runs),
+            "max": max(run[phase] for run in runs),
+        }
+        for phase in phases
+    }
+
+    print(f"{'phase':<20} {'median ms':>10} {'max ms':>10}")
+    for phase, stats in summary.items():
+        print(f"{phase:<20} {stats['median']:>10.1f} {stats['max']:>10.1f}")
+
+    if args.output:
+        with open(args.output, "w") as handle:
+            json.dump({"runs": runs, "summary": summary}, handle, indent=2)
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
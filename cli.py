@@ -0,0 +1,43 @@
+import json
+import click
+from flask import Flask
+
+
+def register_commands(app: Flask):
+    """Register maintenance commands with the Flask CLI (``flask --app main <command>``)"""
+
+    @app.cli.command('init-db')
+    def init_db_command():
+        """Create missing tables and add new columns and indexes to existing ones."""
+        from app import init_db
+
+        for change in init_db(app):
+            click.echo(f"Schema upgrade: {change}")
+        click.echo('Database schema is up to date.')
+
+    @app.cli.command('archive')
+    @click.option('--table', 'tables', multiple=True, help='Only archive these tables')
+    @click.option('--days', type=int, help='Override the retention days of the selected tables')
+    @click.option('--batch-size', type=int, default=500, show_default=True, help='Rows deleted per transaction')
+    @click.option('--pause', type=float, default=0.0, show_default=True, help='Seconds to sleep between batches')
+    @click.option('--archive-dir', help='Directory for archive segments (default: ARCHIVE_DIR under the instance folder)')
+    @click.option('--include-favorites', is_flag=True, help='Also archive favorite query history rows')
+    @click.option('--dry-run', is_flag=True, help='Only count the rows that would be archived')
+    def archive_command(tables, days, batch_size, pause, archive_dir, include_favorites, dry_run):
+        """Move rows past their retention period into archive segments."""
+        from services.retention import RetentionManager, ARCHIVE_MODELS, load_policies
+
+        unknown = [name for name in tables if name not in ARCHIVE_MODELS]
+        if unknown:
+            raise click.BadParameter(f"Unknown tables: {', '.join(unknown)}", param_hint='--table')
+
+        policies = load_policies()
+        if tables:
+            policies = {name: policies[name] for name in tables}
+        if days is not None:
+            policies = {name: days for name in policies}
+
+        manager = RetentionManager(archive_dir=archive_dir, batch_size=batch_size, pause_seconds=pause,
+                                   keep_favorites=not include_favorites)
+        for result in manager.run(policies, dry_run=dry_run):
+            click.echo(json.dumps(result))
@@ -0,0 +1,20 @@
+# Picked up automatically by gunicorn when started from the project root.
+# The app no longer touches the database at import, so `--preload` is safe;
+# the post_fork hook makes sure no pooled connection is ever shared across
+# workers and starts each worker's background services.
+
+
+def post_fork(server, worker):
+    """Drop database connections a preloaded master may have opened and start background services"""
+    from app import db
+    from main import app
+
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+    for engine in app.extensions['replica_router'].engines:
+        engine.dispose(close=False)
+
+    # Threads do not survive the fork, so start them in the worker
+    from routes import start_background_services
+    start_background_services(app)
@@ -0,0 +1,192 @@
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from functools import wraps
+from typing import Dict, Iterable, Optional, Set, Tuple
+from flask import Response, current_app, make_response, request
+from sqlalchemy import event, func, select, update
+from sqlalchemy.exc import IntegrityError
+from werkzeug.http import is_resource_modified
+
+# Tables whose changes affect a @conditional endpoint
+_tracked_tables: Set[str] = set()
+
+
+class ResponseCache:
+    """Small LRU of serialized JSON bodies keyed by ETag"""
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[bytes, frozenset]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, key: str, body: bytes, tables: Iterable[str]):
+        with self._lock:
+            self._entries[key] = (body, frozenset(tables))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, tables: Iterable[str]):
+        """Drop cached responses built from any of ``tables``"""
+        tables = set(tables)
+        with self._lock:
+            for key in [key for key, (_, deps) in self._entries.items() if deps & tables]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+response_cache = ResponseCache()
+
+
+def bump_table_versions(session, tables: Iterable[str]):
+    """Record updates or deletes the high-water marks cannot see.
+
+    Runs in the caller's transaction, so the new validators become visible
+    together with the change. Call it after bulk Core statements; ORM
+    flushes are handled by the session listeners.
+    """
+    from models import TableVersion
+
+    table = TableVersion.__table__
+    connection = session.connection()
+    now = datetime.utcnow()
+    for name in sorted(set(tables)):
+        result = connection.execute(
+            update(table).where(table.c.table_name == name)
+            .values(version=table.c.version + 1, updated_at=now)
+        )
+        if result.rowcount:
+            continue
+        try:
+            with connection.begin_nested():
+                connection.execute(table.insert().values(table_name=name, version=1, updated_at=now))
+        except IntegrityError:
+            # Another transaction created the row first
+            connection.execute(
+                update(table).where(table.c.table_name == name)
+                .values(version=table.c.version + 1, updated_at=now)
+            )
+    session.info.setdefault('changed_tables', set()).update(tables)
+
+
+def init_cache_invalidation(session_class):
+    """Track writes on ``session_class`` to bump table versions and drop cached responses"""
+
+    @event.listens_for(session_class, 'before_flush')
+    def collect_changes(session, flush_context, instances):
+        changed = session.info.setdefault('changed_tables', set())
+        bumped = session.info.setdefault('bump_tables', set())
+        for obj in session.new:
+            changed.add(obj.__table__.name)
+        for obj in session.dirty:
+            if session.is_modified(obj):
+                bumped.add(obj.__table__.name)
+        for obj in session.deleted:
+            bumped.add(obj.__table__.name)
+
+    @event.listens_for(session_class, 'after_flush')
+    def bump_versions(session, flush_context):
+        tables = session.info.pop('bump_tables', set()) & _tracked_tables
+        if tables:
+            bump_table_versions(session, tables)
+
+    @event.listens_for(session_class, 'after_commit')
+    def invalidate(session):
+        tables = session.info.pop('changed_tables', set())
+        if tables:
+            response_cache.invalidate(tables)
+
+    @event.listens_for(session_class, 'after_rollback')
+    def forget(session):
+        session.info.pop('changed_tables', None)
+        session.info.pop('bump_tables', None)
+
+
+def _validators(models) -> Tuple[str, Optional[datetime]]:
+    """Fingerprint and newest change time of the given models' tables"""
+    from models import TableVersion
+
+    db = current_app.extensions['sqlalchemy']
+    names = [model.__table__.name for model in models]
+    versions: Dict[str, Tuple[int, Optional[datetime]]] = {
+        row.table_name: (row.version, row.updated_at)
+        for row in db.session.execute(
+            select(TableVersion.table_name, TableVersion.version, TableVersion.updated_at)
+            .where(TableVersion.table_name.in_(names))
+        )
+    }
+
+    parts = []
+    last_modified = None
+    for model, name in zip(models, names):
+        max_id, max_created = db.session.execute(select(func.max(model.id), func.max(model.created_at))).one()
+        version, bumped_at = versions.get(name, (0, None))
+        parts.append(f"{name}:{max_id}:{max_created.isoformat() if max_created else ''}:{version}")
+        for moment in (max_created, bumped_at):
+            if moment and (last_modified is None or moment > last_modified):
+                last_modified = moment
+
+    fingerprint = hashlib.sha1(f"{request.full_path}|{'|'.join(parts)}".encode('utf-8')).hexdigest()
+    if last_modified is not None:
+        last_modified = last_modified.replace(microsecond=0)
+        # HTTP dates have whole seconds, so a second change within the current second would
+        # look unmodified to If-Modified-Since; leave such responses to the ETag alone
+        if last_modified >= datetime.utcnow().replace(microsecond=0):
+            last_modified = None
+        else:
+            last_modified = last_modified.replace(tzinfo=timezone.utc)
+    return fingerprint, last_modified
+
+
+def conditional(*models):
+    """Serve ETag/Last-Modified for a JSON view and answer 304 without running it.
+
+    Validators come from each model's max id and max created_at plus its
+    TableVersion counter. 200 responses are kept in ``response_cache``.
+    """
+    tables = frozenset(model.__table__.name for model in models)
+    _tracked_tables.update(tables)
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            try:
+                etag, last_modified = _validators(models)
+            except Exception as e:
+                logging.error(f"Error computing cache validators: {str(e)}")
+                return view(*args, **kwargs)
+
+            if not is_resource_modified(request.environ, etag=etag, last_modified=last_modified):
+                response = Response(status=304)
+            else:
+                body = response_cache.get(etag)
+                if body is not None:
+                    response = Response(body, mimetype='application/json')
+                else:
+                    response = make_response(view(*args, **kwargs))
+                    if response.status_code != 200:
+                        return response
+                    response_cache.put(etag, response.get_data(), tables)
+
+            response.set_etag(etag)
+            if last_modified is not None:
+                response.last_modified = last_modified
+            # Let browsers keep the body but check back on every poll
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+        return wrapper
+    return decorator
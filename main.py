@@ -1,4 +1,10 @@
-from app import app
+from app import create_app, init_db
+
+app = create_app()
 
 if __name__ == "__main__":
+    # The development server creates missing tables itself; deployments run `flask --app main init-db`
+    init_db(app)
+    from routes import start_background_services
+    start_background_services(app)
     app.run(host="0.0.0.0", port=5000, debug=True)
@@ -1,6 +1,7 @@
+import uuid
 from datetime import datetime
 from app import db
-from sqlalchemy import Text, DateTime, String, Integer, Boolean, ForeignKey
+from sqlalchemy import Text, DateTime, Date, String, Integer, Boolean, ForeignKey
 from sqlalchemy.orm import relationship
 
 class QueryHistory(db.Model):
@@ -13,7 +14,7 @@ class QueryHistory(db.Model):
     explanation = db.Column(Text)
     model_used = db.Column(String(100))
     context = db.Column(Text)
-    created_at = db.Column(DateTime, default=datetime.utcnow)
+    created_at = db.Column(DateTime, default=datetime.utcnow, index=True)
     is_favorite = db.Column(Boolean, default=False)
 
     # Relationship to AnalyticsEvent
@@ -43,7 +44,7 @@ class SchemaVersion(db.Model):
     explanation = db.Column(Text)
     tables_info = db.Column(Text)  # JSON string of table information
     version = db.Column(Integer, default=1)
-    created_at = db.Column(DateTime, default=datetime.utcnow)
+    created_at = db.Column(DateTime, default=datetime.utcnow, index=True)
     is_active = db.Column(Boolean, default=True)
     
     def to_dict(self):
@@ -60,14 +61,40 @@ class SchemaVersion(db.Model):
             'is_active': self.is_active
         }
 
+class ChatSession(db.Model):
+    __tablename__ = 'chat_sessions'
+
+    id = db.Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    summary = db.Column(Text)  # Rolling summary of turns that fell out of the prompt window
+    summarized_through_id = db.Column(Integer, default=0)  # Last ChatMessage.id folded into summary
+    created_at = db.Column(DateTime, default=datetime.utcnow)
+    updated_at = db.Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    messages = relationship('ChatMessage', back_populates='session', lazy='dynamic')
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'summary': self.summary,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+
 class ChatMessage(db.Model):
     __tablename__ = 'chat_messages'
+    __table_args__ = (
+        db.Index('ix_chat_messages_session_id_id', 'session_id', 'id'),
+    )
     
     id = db.Column(Integer, primary_key=True)
     message = db.Column(Text, nullable=False)
     response = db.Column(Text, nullable=False)
     message_type = db.Column(String(50), default='general')  # 'general', 'schema', 'query'
-    created_at = db.Column(DateTime, default=datetime.utcnow)
+    created_at = db.Column(DateTime, default=datetime.utcnow, index=True)
+
+    # Sessionless messages predate conversational memory
+    session_id = db.Column(String(36), ForeignKey('chat_sessions.id'), nullable=True)
+    session = relationship('ChatSession', back_populates='messages')
     
     def to_dict(self):
         return {
@@ -75,7 +102,8 @@ class ChatMessage(db.Model):
             'message': self.message,
             'response': self.response,
             'message_type': self.message_type,
-            'created_at': self.created_at.isoformat() if self.created_at else None
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'session_id': self.session_id
         }
 
 # --- NEW MODEL FOR ANALYTICS ---
@@ -84,7 +112,7 @@ class AnalyticsEvent(db.Model):
 
     id = db.Column(Integer, primary_key=True)
     event_type = db.Column(String(100), nullable=False)  # e.g., 'generate_sql', 'generate_schema'
-    created_at = db.Column(DateTime, default=datetime.utcnow)
+    created_at = db.Column(DateTime, default=datetime.utcnow, index=True)
     
     # Foreign Key to link to a specific query
     query_history_id = db.Column(Integer, ForeignKey('query_history.id'), nullable=True)
@@ -100,6 +128,25 @@ class AnalyticsEvent(db.Model):
             'query_history_id': self.query_history_id
         }
 
+class AnalyticsRollup(db.Model):
+    __tablename__ = 'analytics_rollups'
+    __table_args__ = (
+        db.UniqueConstraint('day', 'event_type', name='uq_analytics_rollups_day_event_type'),
+    )
+
+    # Daily event counts kept when raw analytics events are archived
+    id = db.Column(Integer, primary_key=True)
+    day = db.Column(Date, nullable=False)
+    event_type = db.Column(String(100), nullable=False)
+    count = db.Column(Integer, nullable=False, default=0)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'day': self.day.isoformat() if self.day else None,
+            'event_type': self.event_type,
+            'count': self.count
+        }
 
 # --- NEW MODEL FOR VERSION CONTROL ---
 # Add this class to your models.py file
@@ -110,7 +157,7 @@ class QueryVersion(db.Model):
     id = db.Column(Integer, primary_key=True)
     version_message = db.Column(String(255), nullable=True)
     generated_sql = db.Column(Text, nullable=False)
-    created_at = db.Column(DateTime, default=datetime.utcnow)
+    created_at = db.Column(DateTime, default=datetime.utcnow, index=True)
     
     # Foreign Key to link to a specific query in the history
     query_history_id = db.Column(Integer, ForeignKey('query_history.id'), nullable=False)
@@ -125,4 +172,13 @@ class QueryVersion(db.Model):
             'generated_sql': self.generated_sql,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'query_history_id': self.query_history_id
-        }
\ No newline at end of file
+        }
+
+class TableVersion(db.Model):
+    __tablename__ = 'table_versions'
+
+    # Bumped when rows are updated or deleted, which table high-water marks miss;
+    # part of the HTTP cache validators in http_cache.py
+    table_name = db.Column(String(64), primary_key=True)
+    version = db.Column(Integer, nullable=False, default=0)
+    updated_at = db.Column(DateTime, default=datetime.utcnow)
@@ -0,0 +1,124 @@
+import os
+import time
+import logging
+import threading
+from functools import wraps
+from typing import Any, Dict, List, Optional
+from flask import current_app, g, has_request_context, request, session
+from flask_sqlalchemy.session import Session
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Engine, URL, make_url
+
+# Seconds after a write during which the same client keeps reading from the primary
+READ_AFTER_WRITE_SECONDS = 5
+HEALTH_CHECK_INTERVAL = 10
+READ_METHODS = ('GET', 'HEAD', 'OPTIONS')
+# Touches a real table so a replica without the schema counts as unhealthy
+HEALTH_CHECK_QUERY = "SELECT 1 FROM query_history LIMIT 1"
+
+
+def resolve_url(url: str, instance_path: str) -> URL:
+    """Resolve relative SQLite paths against the instance folder, as Flask-SQLAlchemy does for the primary"""
+    parsed = make_url(url)
+    if parsed.drivername not in ('sqlite', 'sqlite+pysqlite') or parsed.database in (None, '', ':memory:'):
+        return parsed
+    is_uri = parsed.query.get('uri', False)
+    path = parsed.database[5:] if is_uri else parsed.database
+    if os.path.isabs(path):
+        return parsed
+    os.makedirs(instance_path, exist_ok=True)
+    path = os.path.join(instance_path, path)
+    return parsed.set(database=f"file:{path}" if is_uri else path)
+
+
+class ReplicaRouter:
+    """Round-robin selection over read replicas with cached health checks"""
+
+    def __init__(self, urls: List[Any], engine_options: Optional[Dict[str, Any]] = None,
+                 health_check_interval: float = HEALTH_CHECK_INTERVAL):
+        self.urls = urls
+        self.engines = [create_engine(url, **(engine_options or {})) for url in urls]
+        self.health_check_interval = health_check_interval
+        self._healthy = [True] * len(self.engines)
+        self._checked_at = [0.0] * len(self.engines)
+        self._next = 0
+        self._lock = threading.Lock()
+
+    def _check(self, index: int) -> bool:
+        """Ping a replica unless it was checked recently"""
+        now = time.monotonic()
+        if now - self._checked_at[index] < self.health_check_interval:
+            return self._healthy[index]
+        self._checked_at[index] = now
+        try:
+            with self.engines[index].connect() as connection:
+                connection.execute(text(HEALTH_CHECK_QUERY))
+            if not self._healthy[index]:
+                logging.info(f"Read replica {index} is healthy again")
+            self._healthy[index] = True
+        except Exception as e:
+            if self._healthy[index]:
+                logging.warning(f"Read replica {index} failed health check: {str(e)}")
+            self._healthy[index] = False
+        return self._healthy[index]
+
+    def choose(self) -> Optional[Engine]:
+        """Next healthy replica in round-robin order, or None to use the primary"""
+        with self._lock:
+            start = self._next
+            self._next = (self._next + 1) % len(self.engines) if self.engines else 0
+        for offset in range(len(self.engines)):
+            index = (start + offset) % len(self.engines)
+            if self._check(index):
+                return self.engines[index]
+        return None
+
+    def status(self) -> List[Dict[str, Any]]:
+        return [
+            {'replica': index, 'healthy': self._check(index), 'backend': engine.url.get_backend_name()}
+            for index, engine in enumerate(self.engines)
+        ]
+
+
+class RoutingSession(Session):
+    """Sends reads of ``@read_only`` routes to a replica, everything else to the primary"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and has_request_context() and g.get('read_replica'):
+            engine = g.get('replica_engine')
+            if engine is None:
+                engine = current_app.extensions['replica_router'].choose()
+                # Remember the choice so one request sees one consistent replica
+                g.replica_engine = engine or False
+            if engine:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def init_replicas(app, database_read_urls: str):
+    """Set up the replica router from a comma-separated list of database URLs"""
+    urls = [resolve_url(url.strip(), app.instance_path) for url in database_read_urls.split(',') if url.strip()]
+    router = ReplicaRouter(urls, app.config.get("SQLALCHEMY_ENGINE_OPTIONS"))
+    app.extensions['replica_router'] = router
+
+    @app.after_request
+    def remember_writes(response):
+        # Pin the client to the primary briefly so it reads its own writes
+        if router.engines and request.method not in READ_METHODS and response.status_code < 400:
+            session['primary_until'] = time.time() + READ_AFTER_WRITE_SECONDS
+        return response
+
+    if urls:
+        logging.info(f"Routing read-only requests across {len(urls)} read replica(s)")
+    return router
+
+
+def read_only(view):
+    """Mark a route as safe to serve from a read replica"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        router = current_app.extensions.get('replica_router')
+        if router and router.engines and session.get('primary_until', 0) < time.time():
+            g.read_replica = True
+        return view(*args, **kwargs)
+    return wrapper
@@ -1,15 +1,58 @@
 import json
 import logging
+import threading
 from datetime import datetime, timedelta
-from flask import Blueprint, request, jsonify
+from functools import partial
+from flask import Blueprint, Response, current_app, request, jsonify, stream_with_context
 from app import db
-from models import QueryHistory, SchemaVersion, ChatMessage, AnalyticsEvent, QueryVersion
-from services.sql_generator import SQLGenerator
-from services.schema_generator import SchemaGenerator
+from replicas import read_only
+from http_cache import conditional
+from sqlalchemy import func
+from models import QueryHistory, SchemaVersion, ChatMessage, ChatSession, AnalyticsEvent, AnalyticsRollup, QueryVersion
+from services.chat_memory import ChatMemory
+from services.data_transfer import DataTransfer, ImportConflict, ImportFailed, EXPORT_MODELS, EXPORT_FORMATS
+from services.retention import RetentionManager, ARCHIVE_MODELS
+from services.prompt_index import PromptIndex
 
 api_bp = Blueprint('api', __name__, url_prefix='/api')
-sql_generator = SQLGenerator()
-schema_generator = SchemaGenerator()
+
+# Services are built on first use so importing the app (and forking workers) stays cheap
+_services = {}
+_services_lock = threading.RLock()
+
+def _service(name, factory):
+    service = _services.get(name)
+    if service is None:
+        with _services_lock:
+            service = _services.get(name)
+            if service is None:
+                service = _services[name] = factory()
+    return service
+
+def get_sql_generator():
+    # Imported here because the HTTP client stack is slow to import
+    from services.sql_generator import SQLGenerator
+    return _service('sql_generator', SQLGenerator)
+
+def get_schema_generator():
+    from services.schema_generator import SchemaGenerator
+    return _service('schema_generator', SchemaGenerator)
+
+def get_chat_memory():
+    return _service('chat_memory', lambda: ChatMemory(get_sql_generator()))
+
+def get_data_transfer():
+    return _service('data_transfer', DataTransfer)
+
+def get_retention_manager():
+    return _service('retention_manager', RetentionManager)
+
+def get_prompt_index():
+    return _service('prompt_index', PromptIndex)
+
+def start_background_services(app):
+    """Start work that should be ready before the first request, once per worker"""
+    get_prompt_index().start(app)
 
 @api_bp.route('/health', methods=['GET'])
 def health_check():
@@ -17,7 +60,8 @@ def health_check():
     return jsonify({
         'status': 'healthy',
         'service': 'SQLSense Backend API',
-        'version': '1.0.0'
+        'version': '1.0.0',
+        'read_replicas': current_app.extensions['replica_router'].status()
     })
 
 @api_bp.route('/generate-sql', methods=['POST'])
@@ -34,7 +78,7 @@ def generate_sql():
         database_type = data.get('database_type', 'postgresql')
         
         # Generate SQL using the service
-        result = sql_generator.generate_sql(prompt, context, database_type)
+        result = get_sql_generator().generate_sql(prompt, context, database_type)
         
         if 'error' in result:
             return jsonify(result), 500
@@ -56,6 +100,9 @@ def generate_sql():
         db.session.add(analytics_event)
         db.session.commit()
         
+        # Make the new prompt available to /api/suggest right away
+        get_prompt_index().record(history_entry)
+        
         # Add the new query ID to the response so the frontend can use it
         result['query_id'] = history_entry.id
         return jsonify(result)
@@ -79,7 +126,7 @@ def generate_schema():
         schema_name = data.get('name', 'Generated Schema')
         
         # Generate schema using the service
-        result = schema_generator.generate_schema(description, database_type)
+        result = get_schema_generator().generate_schema(description, database_type)
         
         if 'error' in result:
             return jsonify(result), 500
@@ -111,7 +158,32 @@ def generate_schema():
         db.session.rollback()
         return jsonify({'error': 'Internal server error'}), 500
 
+@api_bp.route('/suggest', methods=['GET'])
+def suggest():
+    """Suggest completions and near-duplicate past prompts with their stored SQL"""
+    try:
+        text = request.args.get('q', '')
+        limit = min(max(request.args.get('limit', 5, type=int), 1), 20)
+        database_type = request.args.get('database_type')
+        
+        if not text.strip():
+            return jsonify({'completions': [], 'similar': []})
+        
+        # Empty until the background build finishes; lookups never query the database
+        prompt_index = get_prompt_index()
+        prompt_index.start(current_app._get_current_object())
+        return jsonify({
+            'completions': prompt_index.complete(text, limit, database_type),
+            'similar': prompt_index.similar(text, limit, database_type)
+        })
+        
+    except Exception as e:
+        logging.error(f"Error getting suggestions: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
 @api_bp.route('/history')
+@read_only
+@conditional(QueryHistory)
 def get_history():
     """Get query history"""
     try:
@@ -134,6 +206,8 @@ def get_history():
         return jsonify({'error': 'Internal server error'}), 500
 
 @api_bp.route('/schema-versions')
+@read_only
+@conditional(SchemaVersion)
 def get_schema_versions():
     """Get schema versions"""
     try:
@@ -183,11 +257,20 @@ def save_item():
 
 # --- NEW: ANALYTICS ENDPOINT ---
 @api_bp.route('/analytics', methods=['GET'])
+@read_only
+@conditional(AnalyticsEvent, QueryHistory)
 def get_analytics():
     """Get usage analytics for the dashboard"""
     try:
-        sql_generations_total = AnalyticsEvent.query.filter_by(event_type='generate_sql').count()
-        schema_generations_total = AnalyticsEvent.query.filter_by(event_type='generate_schema').count()
+        # Archived events live on as daily rollups
+        archived = dict(
+            db.session.query(AnalyticsRollup.event_type, func.sum(AnalyticsRollup.count))
+            .group_by(AnalyticsRollup.event_type).all()
+        )
+        sql_generations_total = AnalyticsEvent.query.filter_by(event_type='generate_sql').count() \
+            + int(archived.get('generate_sql') or 0)
+        schema_generations_total = AnalyticsEvent.query.filter_by(event_type='generate_schema').count() \
+            + int(archived.get('generate_schema') or 0)
         total_queries_saved = QueryHistory.query.count()
 
         return jsonify({
@@ -199,6 +282,38 @@ def get_analytics():
         logging.error(f"Error getting analytics: {str(e)}")
         return jsonify({'error': 'Internal server error'}), 500
 
+@api_bp.route('/archive/<table_name>', methods=['GET'])
+def get_archive(table_name):
+    """Read rows moved out of the hot tables by the retention job"""
+    try:
+        if table_name not in ARCHIVE_MODELS:
+            return jsonify({'error': f"Unknown archive: {table_name}"}), 404
+        
+        limit = min(max(request.args.get('limit', 50, type=int), 1), 500)
+        offset = max(request.args.get('offset', 0, type=int), 0)
+        search = request.args.get('q')
+        
+        rows = []
+        has_more = False
+        for index, row in enumerate(get_retention_manager().read_archive(table_name, search)):
+            if index < offset:
+                continue
+            if len(rows) == limit:
+                has_more = True
+                break
+            rows.append(row)
+        
+        return jsonify({
+            'items': rows,
+            'offset': offset,
+            'limit': limit,
+            'has_more': has_more
+        })
+        
+    except Exception as e:
+        logging.error(f"Error reading archive: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
 # --- NEW: VERSION CONTROL ENDPOINTS ---
 @api_bp.route('/history/<int:query_id>/versions', methods=['POST'])
 def save_query_version(query_id):
@@ -226,6 +341,8 @@ def save_query_version(query_id):
         return jsonify({'error': 'Internal server error'}), 500
 
 @api_bp.route('/history/<int:query_id>/versions', methods=['GET'])
+@read_only
+@conditional(QueryVersion, QueryHistory)
 def get_query_versions(query_id):
     """Get all versions of a specific query"""
     try:
@@ -238,9 +355,20 @@ def get_query_versions(query_id):
         return jsonify({'error': 'Internal server error'}), 500
 
 
+def _compact_chat_session(app, session_id):
+    """Update a session's rolling summary outside the request that triggered it"""
+    with app.app_context():
+        try:
+            session = db.session.get(ChatSession, session_id)
+            if session and get_chat_memory().compact(session):
+                db.session.commit()
+        except Exception as e:
+            logging.error(f"Error compacting chat session {session_id}: {str(e)}")
+            db.session.rollback()
+
 @api_bp.route('/chat', methods=['POST'])
 def chat():
-    """Handle AI assistant chat"""
+    """Handle AI assistant chat within a conversation session"""
     try:
         data = request.get_json()
         
@@ -249,32 +377,135 @@ def chat():
         
         message = data['message']
         message_type = data.get('type', 'general')
+        chat_memory = get_chat_memory()
+        session = chat_memory.get_or_create_session(data.get('session_id'))
         
-        # Generate response using SQL generator for now
-        response = sql_generator.generate_chat_response(message, message_type)
+        # Recent turns that fit the token budget plus the stored summary of older ones
+        history, summary = chat_memory.build_context(session, message)
+        response = get_sql_generator().generate_chat_response(message, message_type, history=history, summary=summary)
         
-        # Save chat message
+        # Save chat message, and a new session with it, in one short transaction
         chat_message = ChatMessage(
             message=message,
             response=response,
-            message_type=message_type
+            message_type=message_type,
+            session_id=session.id
         )
+        db.session.add(session)
         db.session.add(chat_message)
         db.session.commit()
         
-        return jsonify({'response': response})
+        # Fold evicted turns into the rolling summary once the reply has been sent
+        result = jsonify({'response': response, 'session_id': session.id})
+        result.call_on_close(partial(_compact_chat_session, current_app._get_current_object(), session.id))
+        return result
         
     except Exception as e:
         logging.error(f"Error handling chat: {str(e)}")
+        db.session.rollback()
         return jsonify({'error': 'Internal server error'}), 500
 
 @api_bp.route('/chat/history')
+@read_only
+@conditional(ChatMessage)
 def get_chat_history():
-    """Get chat history"""
+    """Get chat history, newest first.
+
+    With ``session_id`` the messages of that session are returned in pages of
+    ``limit``; pass the smallest id seen as ``before_id`` to fetch older ones.
+    """
     try:
-        messages = ChatMessage.query.order_by(ChatMessage.created_at.desc()).limit(20).all()
+        session_id = request.args.get('session_id')
+        limit = min(max(request.args.get('limit', 20, type=int), 1), 100)
+        before_id = request.args.get('before_id', type=int)
+        
+        query = ChatMessage.query
+        if session_id:
+            query = query.filter(ChatMessage.session_id == session_id)
+        if before_id:
+            query = query.filter(ChatMessage.id < before_id)
+        
+        messages = query.order_by(ChatMessage.id.desc()).limit(limit).all()
         return jsonify([msg.to_dict() for msg in messages])
         
     except Exception as e:
         logging.error(f"Error getting chat history: {str(e)}")
         return jsonify({'error': 'Internal server error'}), 500
+
+# --- BULK EXPORT / IMPORT ---
+@api_bp.route('/export', methods=['GET'])
+def export_data():
+    """Stream history tables as NDJSON or CSV, optionally gzip-compressed"""
+    try:
+        file_format = request.args.get('format', 'ndjson')
+        compressed = request.args.get('gzip', 'false').lower() in ('1', 'true', 'yes')
+        tables = [name.strip() for name in request.args.get('tables', ','.join(EXPORT_MODELS)).split(',') if name.strip()]
+        
+        if file_format not in EXPORT_FORMATS:
+            return jsonify({'error': f"Format must be one of: {', '.join(EXPORT_FORMATS)}"}), 400
+        unknown = [name for name in tables if name not in EXPORT_MODELS]
+        if unknown or not tables:
+            return jsonify({'error': f"Unknown tables: {', '.join(unknown)}" if unknown else 'No tables requested'}), 400
+        if file_format == 'csv' and len(tables) != 1:
+            return jsonify({'error': 'CSV export needs exactly one table'}), 400
+        
+        # Export in dependency order regardless of the order requested
+        data_transfer = get_data_transfer()
+        tables = [name for name in EXPORT_MODELS if name in tables]
+        if file_format == 'csv':
+            chunks = data_transfer.export_csv(tables[0])
+            mimetype = 'text/csv'
+            filename = f'{tables[0]}.csv'
+        else:
+            chunks = data_transfer.export_ndjson(tables)
+            mimetype = 'application/x-ndjson'
+            filename = 'sqlsense-export.ndjson'
+        
+        if compressed:
+            chunks = data_transfer.gzip_stream(chunks)
+            mimetype = 'application/gzip'
+            filename += '.gz'
+        
+        return Response(
+            stream_with_context(chunks),
+            mimetype=mimetype,
+            headers={'Content-Disposition': f'attachment; filename={filename}'}
+        )
+        
+    except Exception as e:
+        logging.error(f"Error exporting data: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+@api_bp.route('/import', methods=['POST'])
+def import_data():
+    """Load an export file in batches; re-posting the same file resumes a failed import"""
+    try:
+        upload = request.files.get('file')
+        filename = upload.filename if upload else ''
+        stream = upload.stream if upload else request.stream
+        
+        file_format = request.args.get('format') or ('csv' if '.csv' in filename else 'ndjson')
+        compressed = request.args.get('gzip', str(filename.endswith('.gz'))).lower() in ('1', 'true', 'yes')
+        table_name = request.args.get('table')
+        
+        if file_format not in EXPORT_FORMATS:
+            return jsonify({'error': f"Format must be one of: {', '.join(EXPORT_FORMATS)}"}), 400
+        if file_format == 'csv' and table_name not in EXPORT_MODELS:
+            return jsonify({'error': 'CSV import needs a valid table parameter'}), 400
+        
+        data_transfer = get_data_transfer()
+        lines = data_transfer.open_upload(stream, compressed)
+        stats = data_transfer.import_stream(lines, file_format, table_name)
+        return jsonify(stats)
+        
+    except ImportConflict as e:
+        return jsonify({'error': f"{str(e)}; import into an empty database or one holding an earlier run of this file",
+                        **e.stats}), 409
+        
+    except ImportFailed as e:
+        return jsonify({'error': 'Import stopped before the end of the file; re-run it to resume', **e.stats}), 500
+        
+    except Exception as e:
+        logging.error(f"Error importing data: {str(e)}")
+        db.session.rollback()
+        return jsonify({'error': 'Internal server error'}), 500
@@ -0,0 +1,104 @@
+import os
+import uuid
+import logging
+from typing import Dict, List, Optional, Tuple
+from app import db
+from models import ChatMessage, ChatSession
+
+class ChatMemory:
+    """Builds bounded chat context from recent turns plus a stored rolling summary"""
+
+    def __init__(self, generator):
+        self.generator = generator
+        self.token_budget = int(os.environ.get("CHAT_CONTEXT_TOKENS", 1500))
+        self.max_window_turns = int(os.environ.get("CHAT_MAX_WINDOW_TURNS", 20))
+        self.summary_batch_turns = int(os.environ.get("CHAT_SUMMARY_BATCH_TURNS", 4))
+
+    @staticmethod
+    def estimate_tokens(text: Optional[str]) -> int:
+        """Rough token count (about four characters per token)"""
+        return len(text) // 4 + 1 if text else 0
+
+    def get_or_create_session(self, session_id: Optional[str]) -> ChatSession:
+        """Return the requested session, or a new unsaved one if it is missing or unknown.
+
+        A new session is not added to the database session here, so no write
+        transaction is held open during the model call; the caller adds it
+        together with the first message.
+        """
+        session = db.session.get(ChatSession, session_id) if session_id else None
+        if session is None:
+            session = ChatSession(id=str(uuid.uuid4()), summarized_through_id=0)
+        return session
+
+    def _recent_turns(self, session: ChatSession) -> List[ChatMessage]:
+        """Newest turns not yet in the summary, newest first, served by the (session_id, id) index"""
+        return ChatMessage.query.filter(
+            ChatMessage.session_id == session.id,
+            ChatMessage.id > (session.summarized_through_id or 0)
+        ).order_by(ChatMessage.id.desc()).limit(self.max_window_turns).all()
+
+    def _split(self, session: ChatSession, reserved_tokens: int) -> Tuple[List[ChatMessage], List[ChatMessage]]:
+        """Return (evicted, window), both oldest first.
+
+        ``window`` is the most recent unsummarized turns that fit the budget
+        after ``reserved_tokens``; ``evicted`` is the older unsummarized turns
+        that do not fit and need folding into the summary.
+        """
+        recent = self._recent_turns(session)
+        if not recent:
+            return [], []
+        remaining = self.token_budget - reserved_tokens
+        window = []
+        for turn in recent:
+            cost = self.estimate_tokens(turn.message) + self.estimate_tokens(turn.response)
+            if cost > remaining:
+                break
+            window.append(turn)
+            remaining -= cost
+        window.reverse()
+        if len(window) == len(recent) and len(recent) < self.max_window_turns:
+            return [], window
+
+        # Even the newest turn may be over budget, then everything is summary material
+        boundary = window[0].id if window else recent[0].id + 1
+        evicted = ChatMessage.query.filter(
+            ChatMessage.session_id == session.id,
+            ChatMessage.id > (session.summarized_through_id or 0),
+            ChatMessage.id < boundary
+        ).order_by(ChatMessage.id.asc()).limit(self.max_window_turns).all()
+        return evicted, window
+
+    def build_context(self, session: ChatSession, message: str) -> Tuple[List[Dict[str, str]], Optional[str]]:
+        """Return (history messages, summary) to send alongside ``message``"""
+        reserved = self.estimate_tokens(session.summary) + self.estimate_tokens(message)
+        _, window = self._split(session, reserved)
+        history = []
+        for turn in window:
+            history.append({"role": "user", "content": turn.message})
+            history.append({"role": "assistant", "content": turn.response})
+        return history, session.summary
+
+    def compact(self, session: ChatSession) -> bool:
+        """Fold turns that no longer fit the budget into the stored summary.
+
+        Runs as soon as any turn is evicted. To amortize the summarization
+        call, it folds at least ``summary_batch_turns`` turns, taking the oldest
+        turns of the window too (but never the newest), which leaves room for
+        the next few messages before another summary is needed.
+        """
+        evicted, window = self._split(session, self.estimate_tokens(session.summary))
+        if not evicted:
+            return False
+
+        extra = min(max(self.summary_batch_turns - len(evicted), 0), max(len(window) - 1, 0))
+        folded = evicted + window[:extra]
+        turns = [{"message": turn.message, "response": turn.response} for turn in folded]
+        summary = self.generator.summarize_conversation(session.summary, turns)
+        if not summary:
+            logging.warning(f"Could not summarize chat session {session.id}; will retry after the next message")
+            return False
+
+        session.summary = summary
+        session.summarized_through_id = folded[-1].id
+        return True
@@ -0,0 +1,237 @@
+import io
+import csv
+import json
+import zlib
+import gzip
+import logging
+from datetime import datetime
+from typing import Dict, Any, Iterable, Iterator, List, Optional
+from sqlalchemy import select, func, text, Boolean, DateTime, Integer, String
+from app import db
+from http_cache import bump_table_versions
+from models import QueryHistory, QueryVersion, SchemaVersion, ChatSession, ChatMessage
+
+# Parents come before children so a full export can be re-imported in order
+EXPORT_MODELS = {
+    'query_history': QueryHistory,
+    'query_versions': QueryVersion,
+    'schema_versions': SchemaVersion,
+    'chat_sessions': ChatSession,
+    'chat_messages': ChatMessage,
+}
+
+EXPORT_FORMATS = ('ndjson', 'csv')
+
+
+class DataTransfer:
+    """Streams history tables out as NDJSON/CSV and loads them back in batches"""
+
+    def __init__(self, batch_size: int = 1000):
+        self.batch_size = batch_size
+
+    @staticmethod
+    def _serialize(value: Any) -> Any:
+        if isinstance(value, datetime):
+            return value.isoformat()
+        return value
+
+    @staticmethod
+    def _coerce(column, value: Any) -> Any:
+        """Convert an exported value back to the column's Python type"""
+        if value is None:
+            return None
+        if value == '' and not isinstance(column.type, String):
+            return None
+        if isinstance(column.type, DateTime) and isinstance(value, str):
+            return datetime.fromisoformat(value)
+        if isinstance(column.type, Boolean) and isinstance(value, str):
+            return value.strip().lower() in ('true', '1', 't', 'yes')
+        if isinstance(column.type, Integer) and isinstance(value, str):
+            return int(value)
+        return value
+
+    def _iter_rows(self, table_name: str) -> Iterator[Dict[str, Any]]:
+        """Yield rows of one table through a server-side cursor"""
+        table = EXPORT_MODELS[table_name].__table__
+        connection = db.session.connection().execution_options(stream_results=True, yield_per=self.batch_size)
+        result = connection.execute(select(table).order_by(table.c.id))
+        for row in result.mappings():
+            yield {key: self._serialize(value) for key, value in row.items()}
+
+    def export_ndjson(self, tables: List[str]) -> Iterator[str]:
+        """Yield one ``{"table": ..., "row": ...}`` JSON line per row"""
+        for table_name in tables:
+            for row in self._iter_rows(table_name):
+                yield json.dumps({'table': table_name, 'row': row}) + '\n'
+
+    def export_csv(self, table_name: str) -> Iterator[str]:
+        """Yield a header line followed by one CSV line per row"""
+        columns = [column.name for column in EXPORT_MODELS[table_name].__table__.columns]
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=columns)
+        writer.writeheader()
+        for row in self._iter_rows(table_name):
+            writer.writerow(row)
+            if buffer.tell() >= 64 * 1024:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+
+    @staticmethod
+    def gzip_stream(chunks: Iterable[str]) -> Iterator[bytes]:
+        """Compress a text stream incrementally into gzip format"""
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+        for chunk in chunks:
+            data = compressor.compress(chunk.encode('utf-8'))
+            if data:
+                yield data
+        yield compressor.flush()
+
+    @staticmethod
+    def open_upload(stream, compressed: bool) -> io.TextIOBase:
+        """Wrap an uploaded binary stream for line-by-line text reading"""
+        if compressed:
+            stream = gzip.GzipFile(fileobj=stream, mode='rb')
+        return io.TextIOWrapper(stream, encoding='utf-8', newline='')
+
+    def _iter_ndjson(self, lines: Iterable[str]) -> Iterator[Dict[str, Any]]:
+        for line_number, line in enumerate(lines, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            if record.get('table') not in EXPORT_MODELS:
+                raise ValueError(f"Unknown table on line {line_number}: {record.get('table')}")
+            yield record
+
+    def _iter_csv(self, lines: Iterable[str], table_name: str) -> Iterator[Dict[str, Any]]:
+        # CSV has no null, and export writes None as an empty cell
+        nullable = {column.name for column in EXPORT_MODELS[table_name].__table__.columns if column.nullable}
+        for row in csv.DictReader(lines):
+            yield {
+                'table': table_name,
+                'row': {name: None if value == '' and name in nullable else value for name, value in row.items()}
+            }
+
+    def _insert_batch(self, table_name: str, rows: List[Dict[str, Any]]) -> int:
+        """Insert rows whose ids are not present yet; return how many were new"""
+        table = EXPORT_MODELS[table_name].__table__
+        columns = {column.name: column for column in table.columns}
+        prepared = [
+            {name: self._coerce(columns[name], value) for name, value in row.items() if name in columns}
+            for row in rows
+        ]
+        ids = [row['id'] for row in prepared]
+        existing = {
+            row['id']: row for row in db.session.execute(select(table).where(table.c.id.in_(ids))).mappings()
+        }
+        # Skipping is only safe for rows an earlier run of this import wrote; an
+        # unrelated row with the same id would adopt the imported children
+        for row in prepared:
+            current = existing.get(row['id'])
+            if current is not None and any(current[name] != value for name, value in row.items()):
+                raise ImportConflict(f"{table_name} id {row['id']} already exists with different content")
+        fresh = [row for row in prepared if row['id'] not in existing]
+        if fresh:
+            db.session.execute(table.insert(), fresh)
+        return len(fresh)
+
+    def _sync_sequences(self, table_names: Iterable[str]):
+        """Move PostgreSQL id sequences past imported ids"""
+        if db.engine.dialect.name != 'postgresql':
+            return
+        for table_name in table_names:
+            table = EXPORT_MODELS[table_name].__table__
+            # String keys such as chat_sessions.id have no sequence
+            if not isinstance(table.c.id.type, Integer):
+                continue
+            max_id = db.session.execute(select(func.max(table.c.id))).scalar()
+            if max_id is None:
+                continue
+            db.session.execute(
+                text(f"SELECT setval(pg_get_serial_sequence('{table_name}', 'id'), :max_id, true)"),
+                {'max_id': max_id}
+            )
+        db.session.commit()
+
+    def import_stream(self, lines: Iterable[str], file_format: str = 'ndjson',
+                      table_name: Optional[str] = None) -> Dict[str, Any]:
+        """Load exported rows in committed batches, keeping their original ids.
+
+        Rows whose id already exists with the same content are skipped, so
+        re-running an import after a failure resumes where the last committed
+        batch ended. An existing row with different content raises
+        ``ImportConflict`` instead of being skipped.
+        """
+        if file_format == 'csv':
+            records = self._iter_csv(lines, table_name)
+        else:
+            records = self._iter_ndjson(lines)
+
+        stats = {'imported': {}, 'skipped': {}, 'rows_read': 0}
+        pending: Dict[str, List[Dict[str, Any]]] = {}
+        pending_count = 0
+
+        def flush():
+            for name in list(pending):
+                batch = pending.pop(name)
+                inserted = self._insert_batch(name, batch)
+                stats['imported'][name] = stats['imported'].get(name, 0) + inserted
+                stats['skipped'][name] = stats['skipped'].get(name, 0) + len(batch) - inserted
+                # Imported ids can sit below the current high-water marks
+                if inserted:
+                    bump_table_versions(db.session, [name])
+            db.session.commit()
+
+        try:
+            for record in records:
+                name = record['table']
+                # Keep parent rows ahead of their children when tables interleave
+                if name not in pending and pending:
+                    flush()
+                    pending_count = 0
+                pending.setdefault(name, []).append(record['row'])
+                pending_count += 1
+                stats['rows_read'] += 1
+                if pending_count >= self.batch_size:
+                    flush()
+                    pending_count = 0
+            flush()
+        except ImportConflict as e:
+            db.session.rollback()
+            logging.warning(f"Import stopped after {stats['rows_read']} rows: {str(e)}")
+            stats['committed'] = False
+            e.stats = stats
+            raise
+        except Exception:
+            db.session.rollback()
+            logging.exception(f"Import failed after {stats['rows_read']} rows")
+            stats['committed'] = False
+            try:
+                self._sync_sequences(stats['imported'])
+            except Exception:
+                # Report the original failure, not this one
+                db.session.rollback()
+                logging.exception("Could not sync id sequences after failed import")
+            raise ImportFailed(stats)
+
+        self._sync_sequences(stats['imported'])
+        stats['committed'] = True
+        return stats
+
+
+class ImportFailed(Exception):
+    """Raised when an import stops part-way; ``stats`` reports what was committed"""
+
+    def __init__(self, stats: Dict[str, Any]):
+        super().__init__("Import failed")
+        self.stats = stats
+
+
+class ImportConflict(Exception):
+    """Raised when an imported id is taken by a different row in the target database"""
+
+    def __init__(self, message: str):
+        super().__init__(message)
+        self.stats: Dict[str, Any] = {}
@@ -0,0 +1,291 @@
+import os
+import re
+import math
+import time
+import logging
+import threading
+from collections import OrderedDict
+from itertools import islice
+from typing import Dict, Any, List, Optional
+from sqlalchemy import select
+from app import db
+from models import QueryHistory, TableVersion
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Lowercase and collapse whitespace so trivially different prompts share a key"""
+    return _WHITESPACE.sub(" ", prompt.strip().lower())
+
+
+def _trigrams(text: str) -> frozenset:
+    padded = f"  {text} "
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+class _TrieNode:
+    __slots__ = ("children", "terminal")
+
+    def __init__(self):
+        self.children: Dict[str, "_TrieNode"] = {}
+        self.terminal = False
+
+
+class PromptIndex:
+    """In-memory prefix trie and trigram index over past prompts.
+
+    Each distinct prompt keeps only its latest generated SQL. Entries are held
+    in LRU order; adding past ``max_entries`` evicts the least recently added
+    or suggested prompt. ``start`` runs a background thread that builds the
+    index from ``QueryHistory`` and afterwards, every ``refresh_seconds``,
+    picks up rows written by other workers and drops entries whose row was
+    deleted. Database reads happen outside the lookup lock, so suggestions
+    never wait on them.
+    """
+
+    def __init__(self, max_entries: Optional[int] = None, refresh_seconds: float = 30.0,
+                 similarity_threshold: float = 0.45):
+        self.max_entries = max_entries or int(os.environ.get("SUGGEST_MAX_ENTRIES", 20000))
+        self.refresh_seconds = refresh_seconds
+        self.similarity_threshold = similarity_threshold
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._root = _TrieNode()
+        self._postings: Dict[str, set] = {}
+        self._lock = threading.RLock()
+        self._loaded = False
+        # Highest id read from the table; rows recorded locally do not move it,
+        # so lower ids committed meanwhile by other workers are still loaded
+        self._refresh_id = 0
+        self._history_version = None
+        self._refresh_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # --- maintenance ---
+
+    def _trie_insert(self, key: str):
+        node = self._root
+        for char in key:
+            node = node.children.setdefault(char, _TrieNode())
+        node.terminal = True
+
+    def _trie_remove(self, key: str):
+        path = [self._root]
+        for char in key:
+            node = path[-1].children.get(char)
+            if node is None:
+                return
+            path.append(node)
+        path[-1].terminal = False
+        # Prune branches that no longer lead to any prompt
+        for depth in range(len(key), 0, -1):
+            node = path[depth]
+            if node.terminal or node.children:
+                break
+            del path[depth - 1].children[key[depth - 1]]
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key)
+        self._trie_remove(key)
+        for gram in entry["trigrams"]:
+            keys = self._postings.get(gram)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._postings[gram]
+
+    def _evict(self):
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+
+    def record(self, query: QueryHistory):
+        """Index a newly saved row; before the first build the load will pick it up"""
+        if self._loaded:
+            self.add(query)
+
+    def add(self, query: QueryHistory):
+        """Index one history row, replacing older SQL for the same prompt"""
+        key = normalize_prompt(query.natural_query or "")
+        if not key:
+            return
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = {"trigrams": _trigrams(key)}
+                self._entries[key] = entry
+                self._trie_insert(key)
+                for gram in entry["trigrams"]:
+                    self._postings.setdefault(gram, set()).add(key)
+            elif (query.id or 0) < entry["query_id"]:
+                return
+            entry.update({
+                "prompt": query.natural_query,
+                "query_id": query.id,
+                "generated_sql": query.generated_sql,
+                "database_type": query.database_type,
+            })
+            self._entries.move_to_end(key)
+            self._evict()
+
+    def _load_since(self, after_id: int, limit: int, chunk_size: int = 500):
+        """Index history rows newer than ``after_id``, oldest first"""
+        rows = QueryHistory.query.with_entities(
+            QueryHistory.id, QueryHistory.natural_query, QueryHistory.generated_sql, QueryHistory.database_type
+        ).filter(QueryHistory.id > after_id).order_by(QueryHistory.id.desc()).limit(limit).all()
+        rows.reverse()
+        # Apply in chunks so lookups can interleave with a large build
+        for start in range(0, len(rows), chunk_size):
+            with self._lock:
+                for row in rows[start:start + chunk_size]:
+                    self.add(row)
+        # Skip the id range that fell outside the limit so it is not re-read
+        if rows:
+            self._refresh_id = max(self._refresh_id, rows[-1].id)
+
+    def _prune_deleted(self, chunk_size: int = 500):
+        """Drop entries whose history row no longer exists, e.g. after archiving"""
+        with self._lock:
+            by_id = {entry["query_id"]: key for key, entry in self._entries.items()}
+        ids = list(by_id)
+        missing = []
+        for start in range(0, len(ids), chunk_size):
+            chunk = ids[start:start + chunk_size]
+            present = set(db.session.execute(select(QueryHistory.id).where(QueryHistory.id.in_(chunk))).scalars())
+            missing.extend(query_id for query_id in chunk if query_id not in present)
+        with self._lock:
+            for query_id in missing:
+                entry = self._entries.get(by_id[query_id])
+                # The prompt may have been re-saved under a newer id meanwhile
+                if entry is not None and entry["query_id"] == query_id:
+                    self._remove(by_id[query_id])
+
+    def refresh(self):
+        """Load new rows and drop deleted ones; needs an app context"""
+        with self._refresh_lock:
+            started = time.perf_counter()
+            # Deletes bump the table version, so unchanged versions skip the check
+            version = db.session.execute(
+                select(TableVersion.version).where(TableVersion.table_name == QueryHistory.__tablename__)
+            ).scalar()
+            if self._loaded and version != self._history_version:
+                self._prune_deleted()
+            self._history_version = version
+            self._load_since(self._refresh_id, self.max_entries)
+            if not self._loaded:
+                logging.info(f"Built prompt index with {len(self._entries)} prompts "
+                             f"in {(time.perf_counter() - started) * 1000:.0f}ms")
+            self._loaded = True
+
+    def _run(self, app):
+        while True:
+            # Outside any request, so reads go to the primary rather than a lagging replica
+            with app.app_context():
+                try:
+                    self.refresh()
+                except Exception as e:
+                    logging.error(f"Error refreshing prompt index: {str(e)}")
+                finally:
+                    db.session.remove()
+            if self._stop.wait(self.refresh_seconds):
+                return
+
+    def start(self, app):
+        """Build and refresh the index in a background thread; safe to call repeatedly"""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, args=(app,), name="prompt-index", daemon=True)
+                self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    # --- lookups ---
+
+    def _result(self, key: str, score: Optional[float] = None) -> Dict[str, Any]:
+        entry = self._entries[key]
+        result = {
+            "prompt": entry["prompt"],
+            "query_id": entry["query_id"],
+            "generated_sql": entry["generated_sql"],
+            "database_type": entry["database_type"],
+        }
+        if score is not None:
+            result["score"] = round(score, 3)
+        return result
+
+    def _matches(self, key: str, database_type: Optional[str]) -> bool:
+        return not database_type or self._entries[key]["database_type"] == database_type
+
+    def _recency(self, key: str) -> int:
+        return self._entries[key]["query_id"] or 0
+
+    def complete(self, prefix: str, limit: int = 5, database_type: Optional[str] = None,
+                 max_scan: int = 500) -> List[Dict[str, Any]]:
+        """Past prompts starting with ``prefix``, newest first"""
+        key = normalize_prompt(prefix)
+        with self._lock:
+            node = self._root
+            for char in key:
+                node = node.children.get(char)
+                if node is None:
+                    return []
+
+            found = []
+            stack = [(node, key)]
+            while stack and len(found) < max_scan:
+                node, text = stack.pop()
+                if node.terminal and self._matches(text, database_type):
+                    found.append(text)
+                for char, child in node.children.items():
+                    stack.append((child, text + char))
+
+            found.sort(key=self._recency, reverse=True)
+            results = []
+            for text in found[:limit]:
+                self._entries.move_to_end(text)
+                results.append(self._result(text))
+            return results
+
+    def similar(self, prompt: str, limit: int = 5, database_type: Optional[str] = None,
+                max_candidates: int = 1000) -> List[Dict[str, Any]]:
+        """Near-duplicate past prompts ranked by trigram Jaccard similarity"""
+        key = normalize_prompt(prompt)
+        if not key:
+            return []
+        grams = _trigrams(key)
+        threshold = self.similarity_threshold
+        with self._lock:
+            # A match must share at least ceil(threshold * |grams|) trigrams, so it
+            # appears in at least one posting among the rarest remaining ones
+            # (prefix filtering); unseen trigrams sort first and cost nothing.
+            required = math.ceil(threshold * len(grams))
+            rarest = sorted(grams, key=lambda gram: len(self._postings.get(gram, ())))
+            candidates = set()
+            for gram in rarest[:len(grams) - required + 1]:
+                candidates.update(islice(self._postings.get(gram, ()), max_candidates - len(candidates)))
+                if len(candidates) >= max_candidates:
+                    break
+
+            min_size, max_size = threshold * len(grams), len(grams) / threshold
+            scored = []
+            for candidate in candidates:
+                other = self._entries[candidate]["trigrams"]
+                if not min_size <= len(other) <= max_size or not self._matches(candidate, database_type):
+                    continue
+                overlap = len(grams & other)
+                score = overlap / (len(grams) + len(other) - overlap)
+                if score >= threshold:
+                    scored.append((score, candidate))
+
+            scored.sort(reverse=True)
+            results = []
+            for score, candidate in scored[:limit]:
+                self._entries.move_to_end(candidate)
+                results.append(self._result(candidate, score))
+            return results
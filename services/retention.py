@@ -0,0 +1,192 @@
+import os
+import json
+import gzip
+import time
+import zlib
+import logging
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Dict, Any, Iterator, List, Optional
+from flask import current_app
+from sqlalchemy import select, update, delete, exists, func, or_
+from app import db
+from http_cache import bump_table_versions
+from models import QueryHistory, QueryVersion, ChatMessage, AnalyticsEvent, AnalyticsRollup
+
+ARCHIVE_MODELS = {
+    'analytics_events': AnalyticsEvent,
+    'chat_messages': ChatMessage,
+    'query_history': QueryHistory,
+}
+
+# Days of rows kept in the hot tables; override with RETENTION_<TABLE>_DAYS, 0 disables
+DEFAULT_RETENTION_DAYS = {
+    'analytics_events': 90,
+    'chat_messages': 180,
+    'query_history': 365,
+}
+
+
+def load_policies() -> Dict[str, int]:
+    """Retention days per table, read from the environment"""
+    return {
+        table: int(os.environ.get(f"RETENTION_{table.upper()}_DAYS", days))
+        for table, days in DEFAULT_RETENTION_DAYS.items()
+    }
+
+
+class RetentionManager:
+    """Moves old rows into compressed append-only archive segments.
+
+    Each run writes one gzip NDJSON segment per table under ``archive_dir``.
+    Every batch is appended as its own gzip member and flushed to disk before
+    the rows are deleted, so a crash can at worst archive a batch twice; the
+    reader drops the duplicates by id.
+    """
+
+    def __init__(self, archive_dir: Optional[str] = None, batch_size: int = 500, pause_seconds: float = 0.0,
+                 keep_favorites: bool = True):
+        if archive_dir is None:
+            # Relative to the instance folder so the CLI and web workers share it
+            archive_dir = os.path.join(current_app.instance_path, os.environ.get("ARCHIVE_DIR", "archive"))
+        self.archive_dir = archive_dir
+        self.batch_size = batch_size
+        self.pause_seconds = pause_seconds
+        self.keep_favorites = keep_favorites
+
+    @staticmethod
+    def _serialize(row: Dict[str, Any]) -> Dict[str, Any]:
+        return {key: value.isoformat() if isinstance(value, datetime) else value for key, value in row.items()}
+
+    def _segment_path(self, table_name: str, started: datetime) -> str:
+        return os.path.join(self.archive_dir, table_name, f"{table_name}-{started.strftime('%Y%m%dT%H%M%S%f')}.ndjson.gz")
+
+    @staticmethod
+    def _append(path: str, rows: List[Dict[str, Any]]):
+        """Append rows to a segment as one gzip member and fsync it"""
+        payload = ''.join(json.dumps(row) + '\n' for row in rows).encode('utf-8')
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'ab') as handle:
+            handle.write(compressor.compress(payload) + compressor.flush())
+            handle.flush()
+            os.fsync(handle.fileno())
+
+    def _roll_up(self, rows: List[Dict[str, Any]]):
+        """Add archived analytics events to the daily rollup counts"""
+        counts = Counter((row['created_at'].date(), row['event_type']) for row in rows if row['created_at'])
+        for (day, event_type), count in counts.items():
+            rollup = AnalyticsRollup.query.filter_by(day=day, event_type=event_type).first()
+            if rollup:
+                rollup.count += count
+            else:
+                db.session.add(AnalyticsRollup(day=day, event_type=event_type, count=count))
+
+    def _detach_history(self, ids: List[int], rows: List[Dict[str, Any]]):
+        """Archive query versions with their parent and keep events by unlinking them"""
+        versions = QueryVersion.__table__
+        by_parent: Dict[int, List[Dict[str, Any]]] = {}
+        for version in db.session.execute(select(versions).where(versions.c.query_history_id.in_(ids))).mappings():
+            by_parent.setdefault(version['query_history_id'], []).append(self._serialize(dict(version)))
+        for row in rows:
+            row['versions'] = by_parent.get(row['id'], [])
+
+        db.session.execute(delete(versions).where(versions.c.query_history_id.in_(ids)))
+        events = AnalyticsEvent.__table__
+        db.session.execute(update(events).where(events.c.query_history_id.in_(ids)).values(query_history_id=None))
+
+    def _eligible(self, table, cutoff: datetime) -> List[Any]:
+        """Conditions for rows past their retention period"""
+        conditions = [table.c.created_at < cutoff]
+        if table.name == 'query_history':
+            # History stays live while the user keeps saving versions of it
+            versions = QueryVersion.__table__
+            conditions.append(~exists().where(
+                versions.c.query_history_id == table.c.id,
+                versions.c.created_at >= cutoff
+            ))
+            if self.keep_favorites:
+                conditions.append(or_(table.c.is_favorite.is_(None), table.c.is_favorite.is_(False)))
+        return conditions
+
+    def archive_table(self, table_name: str, cutoff: datetime, dry_run: bool = False) -> Dict[str, Any]:
+        """Archive and delete rows created before ``cutoff`` in small batches.
+
+        Favorite history rows (unless ``keep_favorites`` is off) and history
+        rows with a version saved after ``cutoff`` are kept.
+        """
+        table = ARCHIVE_MODELS[table_name].__table__
+        conditions = self._eligible(table, cutoff)
+        eligible = select(table).where(*conditions).order_by(table.c.id).limit(self.batch_size)
+
+        if dry_run:
+            count = db.session.execute(select(func.count()).select_from(table).where(*conditions)).scalar()
+            return {'table': table_name, 'cutoff': cutoff.isoformat(), 'eligible': count, 'archived': 0}
+
+        path = self._segment_path(table_name, datetime.utcnow())
+        # Archiving history also removes its versions and unlinks its events
+        touched = [table_name, 'query_versions', 'analytics_events'] if table_name == 'query_history' else [table_name]
+        archived = 0
+        while True:
+            rows = [dict(row) for row in db.session.execute(eligible).mappings()]
+            if not rows:
+                break
+            ids = [row['id'] for row in rows]
+
+            if table_name == 'analytics_events':
+                self._roll_up(rows)
+            serialized = [self._serialize(row) for row in rows]
+            if table_name == 'query_history':
+                self._detach_history(ids, serialized)
+
+            self._append(path, serialized)
+            db.session.execute(delete(table).where(table.c.id.in_(ids)))
+            bump_table_versions(db.session, touched)
+            db.session.commit()
+
+            archived += len(rows)
+            logging.info(f"Archived {archived} rows from {table_name}")
+            if self.pause_seconds:
+                time.sleep(self.pause_seconds)
+
+        return {'table': table_name, 'cutoff': cutoff.isoformat(), 'archived': archived,
+                'segment': path if archived else None}
+
+    def run(self, policies: Optional[Dict[str, int]] = None, dry_run: bool = False) -> List[Dict[str, Any]]:
+        """Apply every enabled retention policy"""
+        policies = policies if policies is not None else load_policies()
+        now = datetime.utcnow()
+        results = []
+        for table_name in ARCHIVE_MODELS:
+            days = policies.get(table_name, 0)
+            if days <= 0:
+                continue
+            results.append(self.archive_table(table_name, now - timedelta(days=days), dry_run))
+        return results
+
+    def _segments(self, table_name: str) -> List[str]:
+        directory = os.path.join(self.archive_dir, table_name)
+        if not os.path.isdir(directory):
+            return []
+        return sorted(
+            (os.path.join(directory, name) for name in os.listdir(directory) if name.endswith('.ndjson.gz')),
+            reverse=True
+        )
+
+    def read_archive(self, table_name: str, search: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """Yield archived rows, newest segment first, skipping duplicate ids"""
+        seen = set()
+        for path in self._segments(table_name):
+            try:
+                with gzip.open(path, 'rt', encoding='utf-8') as handle:
+                    for line in handle:
+                        row = json.loads(line)
+                        if row['id'] in seen:
+                            continue
+                        seen.add(row['id'])
+                        if search and search.lower() not in json.dumps(row, ensure_ascii=False).lower():
+                            continue
+                        yield row
+            except (EOFError, zlib.error, gzip.BadGzipFile):
+                # A run interrupted mid-write leaves a truncated final member
+                logging.warning(f"Stopped reading truncated archive segment {path}")
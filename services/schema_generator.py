@@ -8,7 +8,7 @@ from typing import Dict, Any, List
 class SchemaGenerator:
     def __init__(self):
         self.api_key = os.environ.get("OPENROUTER_API_KEY", "")
-        self.base_url = "https://openrouter.ai/api/v1/chat/completions"
+        self.base_url = os.environ.get("OPENROUTER_BASE_URL", "https://openrouter.ai/api/v1/chat/completions")
         self.model = "moonshotai/kimi-k2:free"
         
     def _get_headers(self) -> Dict[str, str]:
@@ -2,12 +2,12 @@ import os
 import httpx
 import asyncio
 import logging
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
 
 class SQLGenerator:
     def __init__(self):
         self.api_key = os.environ.get("OPENROUTER_API_KEY", "")
-        self.base_url = "https://openrouter.ai/api/v1/chat/completions"
+        self.base_url = os.environ.get("OPENROUTER_BASE_URL", "https://openrouter.ai/api/v1/chat/completions")
         self.model = "moonshotai/kimi-k2:free"
         
     def _get_headers(self) -> Dict[str, str]:
@@ -115,8 +115,50 @@ Format your response as JSON with these fields:
             logging.error(f"Error in generate_sql: {str(e)}")
             return {"error": f"Failed to generate SQL: {str(e)}"}
     
-    def generate_chat_response(self, message: str, message_type: str = "general") -> str:
-        """Generate response for AI assistant chat"""
+    async def _make_text_call(self, messages: list, temperature: float, max_tokens: int) -> Optional[str]:
+        """Make async API call to OpenRouter and return the plain text reply"""
+        try:
+            async with httpx.AsyncClient(timeout=30.0) as client:
+                response = await client.post(
+                    self.base_url,
+                    headers=self._get_headers(),
+                    json={
+                        "model": self.model,
+                        "messages": messages,
+                        "temperature": temperature,
+                        "max_tokens": max_tokens
+                    }
+                )
+                
+                if response.status_code == 200:
+                    data = response.json()
+                    if "choices" in data and data["choices"]:
+                        return data["choices"][0]["message"]["content"]
+                
+                logging.error(f"API call failed: {response.status_code} - {response.text}")
+                return None
+                
+        except Exception as e:
+            logging.error(f"Error making API call: {str(e)}")
+            return None
+    
+    def _run(self, coroutine):
+        """Run an async API call in sync context"""
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            return loop.run_until_complete(coroutine)
+        finally:
+            loop.close()
+    
+    def generate_chat_response(self, message: str, message_type: str = "general",
+                               history: Optional[List[Dict[str, str]]] = None,
+                               summary: Optional[str] = None) -> str:
+        """Generate response for AI assistant chat.
+
+        ``history`` holds earlier turns as chat-completion messages, oldest
+        first, and ``summary`` condenses any turns older than that.
+        """
         try:
             system_prompt = """You are an AI assistant for SQLSense, a tool that helps users generate SQL queries and database schemas from natural language.
 
@@ -129,45 +171,39 @@ You can help with:
 
 Keep responses concise and helpful."""
             
-            messages = [
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": message}
-            ]
-            
-            # Run async function in sync context
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            
-            async def get_response():
-                try:
-                    async with httpx.AsyncClient(timeout=30.0) as client:
-                        response = await client.post(
-                            self.base_url,
-                            headers=self._get_headers(),
-                            json={
-                                "model": self.model,
-                                "messages": messages,
-                                "temperature": 0.7,
-                                "max_tokens": 500
-                            }
-                        )
-                        
-                        if response.status_code == 200:
-                            data = response.json()
-                            if "choices" in data and data["choices"]:
-                                return data["choices"][0]["message"]["content"]
-                        
-                        return "I'm sorry, I'm having trouble responding right now. Please try again."
-                        
-                except Exception as e:
-                    logging.error(f"Error in chat response: {str(e)}")
-                    return "I'm sorry, I encountered an error. Please try again."
+            messages = [{"role": "system", "content": system_prompt}]
+            if summary:
+                messages.append({"role": "system", "content": f"Summary of the earlier conversation: {summary}"})
+            messages.extend(history or [])
+            messages.append({"role": "user", "content": message})
             
-            result = loop.run_until_complete(get_response())
-            loop.close()
+            result = self._run(self._make_text_call(messages, temperature=0.7, max_tokens=500))
+            if result is None:
+                return "I'm sorry, I'm having trouble responding right now. Please try again."
             
             return result
             
         except Exception as e:
             logging.error(f"Error in generate_chat_response: {str(e)}")
             return "I'm sorry, I encountered an error. Please try again."
+    
+    def summarize_conversation(self, previous_summary: Optional[str], turns: List[Dict[str, str]]) -> Optional[str]:
+        """Fold older chat turns into a rolling summary, or return None on failure"""
+        try:
+            transcript = "\n".join(f"User: {turn['message']}\nAssistant: {turn['response']}" for turn in turns)
+            prompt = "Update the conversation summary with the new turns below. Keep table names, columns, " \
+                     "database types and decisions the user made. Reply with the summary only, in under 150 words."
+            if previous_summary:
+                prompt += f"\n\nCurrent summary:\n{previous_summary}"
+            prompt += f"\n\nNew turns:\n{transcript}"
+            
+            messages = [
+                {"role": "system", "content": "You summarize conversations between a user and a SQL assistant."},
+                {"role": "user", "content": prompt}
+            ]
+            result = self._run(self._make_text_call(messages, temperature=0.2, max_tokens=300))
+            return result.strip() if result else None
+            
+        except Exception as e:
+            logging.error(f"Error in summarize_conversation: {str(e)}")
+            return None
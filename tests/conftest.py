@@ -0,0 +1,42 @@
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    """App bound to a fresh SQLite file with all tables created"""
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'sqlsense.db'}")
+    monkeypatch.setenv("OPENROUTER_API_KEY", "test-key")
+    monkeypatch.delenv("DATABASE_READ_URLS", raising=False)
+    monkeypatch.delenv("AUTO_CREATE_TABLES", raising=False)
+
+    from app import create_app, db, init_db
+    from http_cache import response_cache
+    import routes
+
+    app = create_app()
+    app.config["TESTING"] = True
+    app.instance_path = str(tmp_path / "instance")
+    init_db(app)
+    routes._services.clear()
+    response_cache.clear()
+
+    with app.app_context():
+        yield app
+        db.session.remove()
+        db.engine.dispose()
+    routes._services.clear()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def db(app):
+    from app import db
+    return db
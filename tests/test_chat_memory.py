@@ -0,0 +1,134 @@
+import sqlite3
+import routes
+from models import ChatMessage, ChatSession
+from services.chat_memory import ChatMemory
+
+
+class FakeGenerator:
+    def __init__(self):
+        self.summaries = []
+        self.contexts = []
+
+    def summarize_conversation(self, previous_summary, turns):
+        self.summaries.append(turns)
+        return f"{previous_summary or ''}|" + ",".join(turn["message"] for turn in turns)
+
+    def generate_chat_response(self, message, message_type, history=None, summary=None):
+        self.contexts.append((history, summary))
+        return f"answer to {message}"
+
+
+def _memory(monkeypatch, token_budget, batch_turns):
+    monkeypatch.setenv("CHAT_CONTEXT_TOKENS", str(token_budget))
+    monkeypatch.setenv("CHAT_SUMMARY_BATCH_TURNS", str(batch_turns))
+    return ChatMemory(FakeGenerator())
+
+
+def _add_turns(db, session, count, start=0):
+    for i in range(start, start + count):
+        db.session.add(ChatMessage(message=f"m{i}", response="r" * 40, message_type="general", session_id=session.id))
+    db.session.commit()
+
+
+def test_new_session_is_not_written_until_the_caller_adds_it(db, monkeypatch):
+    memory = _memory(monkeypatch, 1500, 4)
+    session = memory.get_or_create_session(None)
+    assert session.id
+    assert not db.session.new
+    assert db.session.get(ChatSession, session.id) is None
+    assert memory.get_or_create_session("unknown").id != session.id
+
+
+def _tokens(memory, history, summary, message):
+    return sum(memory.estimate_tokens(item["content"]) for item in history) + \
+        memory.estimate_tokens(summary) + memory.estimate_tokens(message)
+
+
+def test_context_never_exceeds_the_token_budget(db, monkeypatch):
+    # Each turn costs about 12 tokens, so a 40 token budget keeps the last two or three
+    memory = _memory(monkeypatch, 40, 4)
+    session = memory.get_or_create_session(None)
+    db.session.add(session)
+    _add_turns(db, session, 2)
+
+    assert memory.compact(session) is False
+    history, summary = memory.build_context(session, "next")
+    assert [item["content"] for item in history if item["role"] == "user"] == ["m0", "m1"]
+
+    _add_turns(db, session, 3, start=2)
+    history, summary = memory.build_context(session, "next")
+    assert _tokens(memory, history, summary, "next") <= memory.token_budget
+    assert [item["content"] for item in history if item["role"] == "user"][-1] == "m4"
+
+
+def test_compact_runs_on_first_eviction_and_folds_a_batch(db, monkeypatch):
+    memory = _memory(monkeypatch, 40, 2)
+    session = memory.get_or_create_session(None)
+    db.session.add(session)
+    _add_turns(db, session, 4)
+
+    assert memory.compact(session) is True
+    db.session.commit()
+    folded = [turn["message"] for turn in memory.generator.summaries[0]]
+    assert len(folded) >= memory.summary_batch_turns
+    assert folded == [f"m{i}" for i in range(len(folded))]
+    assert session.summarized_through_id == db.session.execute(
+        ChatMessage.__table__.select().where(ChatMessage.message == folded[-1])
+    ).one().id
+
+    history, summary = memory.build_context(session, "next")
+    sent = [item["content"] for item in history if item["role"] == "user"]
+    assert summary.endswith(",".join(folded))
+    assert _tokens(memory, history, summary, "next") <= memory.token_budget
+    # Every turn is either summarized or sent verbatim
+    assert folded + sent == [f"m{i}" for i in range(4)]
+    assert memory.compact(session) is False
+
+
+def test_chat_route_holds_no_write_lock_during_the_model_call(app, client, db, monkeypatch):
+    generator = FakeGenerator()
+    path = db.engine.url.database
+
+    def respond(message, message_type, history=None, summary=None):
+        # A concurrent writer must not wait on this request
+        with sqlite3.connect(path, timeout=0) as other:
+            other.execute("CREATE TABLE IF NOT EXISTS probe (id INTEGER)")
+            other.execute("INSERT INTO probe (id) VALUES (1)")
+        return FakeGenerator.generate_chat_response(generator, message, message_type, history, summary)
+
+    generator.generate_chat_response = respond
+    routes._services["sql_generator"] = generator
+
+    response = client.post("/api/chat", json={"message": "hello"})
+    assert response.status_code == 200
+    session_id = response.get_json()["session_id"]
+    assert db.session.get(ChatSession, session_id) is not None
+
+    response = client.post("/api/chat", json={"message": "again", "session_id": session_id})
+    assert response.get_json()["session_id"] == session_id
+    assert ChatMessage.query.filter_by(session_id=session_id).count() == 2
+    history, _ = generator.contexts[-1]
+    assert history[0] == {"role": "user", "content": "hello"}
+
+
+def test_chat_route_compacts_after_the_reply(app, client, db, monkeypatch):
+    monkeypatch.setenv("CHAT_CONTEXT_TOKENS", "40")
+    monkeypatch.setenv("CHAT_SUMMARY_BATCH_TURNS", "2")
+    generator = FakeGenerator()
+    folded = []
+    generator.summarize_conversation = lambda previous, turns: folded.extend(turns) or "summary"
+    routes._services["sql_generator"] = generator
+
+    session_id = None
+    for i in range(4):
+        response = client.post("/api/chat", json={"message": f"question {i} " * 8, "session_id": session_id})
+        session_id = response.get_json()["session_id"]
+        response.close()
+
+    assert folded
+    session = db.session.get(ChatSession, session_id)
+    db.session.refresh(session)
+    assert session.summary == "summary" and session.summarized_through_id
+    history, summary = generator.contexts[-1]
+    memory = routes.get_chat_memory()
+    assert _tokens(memory, history, summary, "question 3 " * 8) <= memory.token_budget
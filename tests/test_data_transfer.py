@@ -0,0 +1,89 @@
+import pytest
+from models import QueryHistory, QueryVersion
+from services.data_transfer import DataTransfer, ImportConflict, ImportFailed
+
+
+def _seed(db, count=5):
+    for i in range(count):
+        query = QueryHistory(natural_query=f"prompt {i}", generated_sql=f"SELECT {i};", database_type="sqlite",
+                             explanation=None if i % 2 else f"explains {i}", context=None)
+        db.session.add(query)
+        db.session.flush()
+        db.session.add(QueryVersion(query_history_id=query.id, generated_sql=query.generated_sql, version_message=None))
+    db.session.commit()
+
+
+def _snapshot(db, model):
+    table = model.__table__
+    return [dict(row) for row in db.session.execute(table.select().order_by(table.c.id)).mappings()]
+
+
+def _clear(db):
+    db.session.execute(QueryVersion.__table__.delete())
+    db.session.execute(QueryHistory.__table__.delete())
+    db.session.commit()
+
+
+def _lines(chunks):
+    return "".join(chunks).splitlines(keepends=True)
+
+
+def test_csv_round_trip_keeps_nulls(db):
+    _seed(db)
+    before = _snapshot(db, QueryHistory)
+    transfer = DataTransfer(batch_size=2)
+    exported = _lines(transfer.export_csv("query_history"))
+    _clear(db)
+
+    stats = transfer.import_stream(exported, "csv", "query_history")
+    assert stats["imported"] == {"query_history": 5}
+    after = _snapshot(db, QueryHistory)
+    assert after == before
+    assert after[1]["explanation"] is None and after[1]["context"] is None
+
+
+def test_failed_import_resumes_by_id(db):
+    _seed(db)
+    before = _snapshot(db, QueryHistory) + _snapshot(db, QueryVersion)
+    transfer = DataTransfer(batch_size=2)
+    exported = _lines(transfer.export_ndjson(["query_history", "query_versions"]))
+    _clear(db)
+
+    broken = exported[:3] + ['{"table": "query_history", "row": not json}\n']
+    with pytest.raises(ImportFailed) as failure:
+        transfer.import_stream(broken)
+    assert failure.value.stats["committed"] is False
+    assert failure.value.stats["imported"] == {"query_history": 2}
+
+    stats = transfer.import_stream(exported)
+    assert stats["imported"] == {"query_history": 3, "query_versions": 5}
+    assert stats["skipped"] == {"query_history": 2, "query_versions": 0}
+    assert _snapshot(db, QueryHistory) + _snapshot(db, QueryVersion) == before
+
+
+def test_failed_sequence_sync_does_not_hide_the_import_error(db, monkeypatch):
+    transfer = DataTransfer()
+
+    def broken_sync(table_names):
+        raise RuntimeError("sequence sync failed")
+
+    monkeypatch.setattr(transfer, "_sync_sequences", broken_sync)
+    with pytest.raises(ImportFailed):
+        transfer.import_stream(['{"table": "nope", "row": {}}\n'])
+
+
+def test_import_refuses_ids_taken_by_different_rows(db, client):
+    _seed(db, count=2)
+    transfer = DataTransfer()
+    exported = _lines(transfer.export_ndjson(["query_history", "query_versions"]))
+    _clear(db)
+    db.session.add(QueryHistory(id=1, natural_query="unrelated", generated_sql="SELECT 9;", database_type="sqlite"))
+    db.session.commit()
+
+    with pytest.raises(ImportConflict):
+        transfer.import_stream(exported)
+    assert QueryVersion.query.count() == 0
+
+    response = client.post("/api/import", data="".join(exported), content_type="application/x-ndjson")
+    assert response.status_code == 409
+    assert QueryHistory.query.one().natural_query == "unrelated"
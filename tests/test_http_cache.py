@@ -0,0 +1,91 @@
+from datetime import datetime, timedelta
+from werkzeug.http import http_date
+import http_cache
+from http_cache import response_cache
+from models import QueryHistory, TableVersion
+
+PAST = datetime.utcnow() - timedelta(minutes=5)
+
+
+def _query(db, prompt="list customers", created_at=PAST):
+    query = QueryHistory(natural_query=prompt, generated_sql="SELECT 1;", database_type="sqlite", created_at=created_at)
+    db.session.add(query)
+    db.session.commit()
+    return query
+
+
+def _version(db, table_name):
+    row = db.session.get(TableVersion, table_name)
+    return row.version if row else 0
+
+
+def test_unchanged_poll_gets_304_by_etag_and_by_date(db, client):
+    _query(db)
+    first = client.get("/api/history")
+    assert first.status_code == 200
+    assert first.headers["Cache-Control"] == "no-cache"
+    assert first.last_modified is not None
+
+    assert client.get("/api/history", headers={"If-None-Match": first.headers["ETag"]}).status_code == 304
+    since = {"If-Modified-Since": first.headers["Last-Modified"]}
+    assert client.get("/api/history", headers=since).status_code == 304
+
+
+def test_etag_depends_on_the_endpoint_and_its_arguments(db, client):
+    _query(db)
+    etags = {client.get(path).headers["ETag"] for path in
+             ("/api/history", "/api/history?page=2", "/api/analytics", "/api/chat/history")}
+    assert len(etags) == 4
+
+
+def test_updates_and_deletes_bump_table_versions_and_change_the_etag(db, client):
+    query = _query(db)
+    etag = client.get("/api/history").headers["ETag"]
+
+    assert client.post("/api/save", json={"type": "query", "query_id": query.id, "is_favorite": True}).status_code == 200
+    assert _version(db, "query_history") == 1
+    response = client.get("/api/history", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.get_json()["queries"][0]["is_favorite"] is True
+
+    etag = response.headers["ETag"]
+    db.session.delete(db.session.get(QueryHistory, query.id))
+    db.session.commit()
+    assert _version(db, "query_history") == 2
+    response = client.get("/api/history", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.get_json()["queries"] == []
+
+
+def test_commits_invalidate_cached_responses_of_their_tables(db, client):
+    _query(db)
+    client.get("/api/history")
+    client.get("/api/schema-versions")
+    assert len(response_cache._entries) == 2
+
+    _query(db, "list orders")
+    assert [deps for _, deps in response_cache._entries.values()] == [frozenset({"schema_versions"})]
+
+
+def test_change_in_the_current_second_is_left_to_the_etag(db, client, monkeypatch):
+    now = datetime(2030, 1, 1, 12, 0, 0, 300000)
+
+    class FrozenDatetime(datetime):
+        @classmethod
+        def utcnow(cls):
+            return now
+
+    monkeypatch.setattr(http_cache, "datetime", FrozenDatetime)
+    query = _query(db, created_at=now)
+    first = client.get("/api/history")
+    assert first.last_modified is None
+
+    # Toggled within the same second; a date-only poll must not get a stale 304
+    query.is_favorite = True
+    db.session.commit()
+    response = client.get("/api/history", headers={"If-Modified-Since": http_date(now.replace(microsecond=0))})
+    assert response.status_code == 200
+    assert response.get_json()["queries"][0]["is_favorite"] is True
+
+    now = datetime(2030, 1, 1, 12, 0, 1, 500000)
+    assert client.get("/api/history").last_modified is not None
@@ -0,0 +1,132 @@
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from models import QueryHistory
+from services.prompt_index import PromptIndex
+from services.retention import RetentionManager
+
+
+def _row(query_id, prompt, database_type="postgresql"):
+    return SimpleNamespace(id=query_id, natural_query=prompt, generated_sql=f"SELECT {query_id};",
+                           database_type=database_type)
+
+
+def _save(db, prompt):
+    query = QueryHistory(natural_query=prompt, generated_sql="SELECT 1;", database_type="sqlite")
+    db.session.add(query)
+    db.session.commit()
+    return query
+
+
+def _prompts(results):
+    return [result["prompt"] for result in results]
+
+
+def test_complete_returns_newest_matches_and_normalizes_prompts():
+    index = PromptIndex(max_entries=10)
+    index.add(_row(1, "List all customers"))
+    index.add(_row(2, "list   ALL customers by country"))
+    index.add(_row(3, "list orders", "mysql"))
+    index.add(_row(4, "List all customers"))
+
+    assert len(index) == 3
+    results = index.complete("list all cust")
+    assert [result["query_id"] for result in results] == [4, 2]
+    assert _prompts(index.complete("list", database_type="mysql")) == ["list orders"]
+    assert index.complete("delete") == []
+
+
+def test_removing_a_prompt_prunes_its_trie_branch():
+    index = PromptIndex(max_entries=10)
+    index.add(_row(1, "list orders"))
+    index.add(_row(2, "list orders by day"))
+    index._remove("list orders by day")
+
+    assert _prompts(index.complete("list orders")) == ["list orders"]
+    node = index._root
+    for char in "list orders":
+        node = node.children[char]
+    assert node.terminal and node.children == {}
+
+    index._remove("list orders")
+    assert index._root.children == {}
+    assert index._postings == {}
+
+
+def test_similar_ranks_near_duplicates_above_the_threshold():
+    index = PromptIndex(max_entries=100)
+    for i in range(50):
+        index.add(_row(i + 1, f"unrelated report number {i}"))
+    index.add(_row(100, "total revenue per product category"))
+    index.add(_row(101, "total revenue for each product category"))
+
+    results = index.similar("total revenue by product category")
+    assert _prompts(results) == ["total revenue per product category", "total revenue for each product category"]
+    assert all(result["score"] >= index.similarity_threshold for result in results)
+    assert index.similar("completely different words") == []
+
+
+def test_lru_eviction_keeps_recently_suggested_prompts():
+    index = PromptIndex(max_entries=2)
+    index.add(_row(1, "first prompt"))
+    index.add(_row(2, "second prompt"))
+    index.complete("first")
+    index.add(_row(3, "third prompt"))
+
+    assert len(index) == 2
+    assert index.complete("second") == []
+    assert _prompts(index.complete("first")) == ["first prompt"]
+    assert "second prompt" not in {key for keys in index._postings.values() for key in keys}
+
+
+def test_refresh_loads_rows_committed_before_a_locally_recorded_one(db):
+    index = PromptIndex(max_entries=100)
+    _save(db, "list products")
+    index.refresh()
+
+    # Another worker commits a row, then this worker records a newer one
+    _save(db, "list customers")
+    index.record(_save(db, "list suppliers"))
+    index.refresh()
+
+    assert _prompts(index.complete("list customers")) == ["list customers"]
+    assert len(index) == 3
+
+
+def test_refresh_drops_rows_removed_by_retention(db, tmp_path):
+    index = PromptIndex(max_entries=100)
+    old = QueryHistory(natural_query="archived prompt", generated_sql="SELECT 1;", database_type="sqlite",
+                       created_at=datetime.utcnow() - timedelta(days=400))
+    db.session.add(old)
+    db.session.commit()
+    _save(db, "archived prompt again")
+    index.refresh()
+    assert len(index.complete("archived prompt")) == 2
+
+    RetentionManager(archive_dir=str(tmp_path)).archive_table("query_history", datetime.utcnow() - timedelta(days=365))
+    index.refresh()
+    assert _prompts(index.complete("archived")) == ["archived prompt again"]
+    assert _prompts(index.similar("archived prompt")) == ["archived prompt again"]
+
+
+def test_background_thread_builds_the_index_and_lookups_skip_the_database(app, db, client):
+    import routes
+
+    _save(db, "list invoices")
+    index = PromptIndex(max_entries=100, refresh_seconds=0.05)
+    routes._services["prompt_index"] = index
+    try:
+        index.start(app)
+        deadline = time.monotonic() + 5
+        while not index.complete("list") and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert _prompts(index.complete("list")) == ["list invoices"]
+
+        _save(db, "list payments")
+        deadline = time.monotonic() + 5
+        while len(index) < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        response = client.get("/api/suggest?q=list%20pay")
+        assert _prompts(response.get_json()["completions"]) == ["list payments"]
+    finally:
+        index.stop()
@@ -0,0 +1,81 @@
+import os
+import shutil
+import sqlite3
+import pytest
+from models import QueryHistory
+from replicas import ReplicaRouter, resolve_url
+
+
+@pytest.fixture
+def replica_app(app, monkeypatch):
+    """Second app on the same primary, reading from whatever replica file ``make`` was given"""
+    def make(replica_path):
+        from app import create_app
+        monkeypatch.setenv("DATABASE_READ_URLS", f"sqlite:///{replica_path}")
+        replica_app = create_app()
+        replica_app.config["TESTING"] = True
+        return replica_app
+    return make
+
+
+def test_relative_sqlite_paths_resolve_against_instance_path(tmp_path):
+    instance = str(tmp_path / "instance")
+    assert resolve_url("sqlite:///replica.db", instance).database == os.path.join(instance, "replica.db")
+    assert resolve_url("sqlite:////abs/replica.db", instance).database == "/abs/replica.db"
+    assert resolve_url("sqlite://", instance).database in (None, "")
+    assert resolve_url("postgresql://reader@replica/sqlsense", instance).database == "sqlsense"
+
+
+def test_replica_without_schema_is_unhealthy(tmp_path):
+    sqlite3.connect(str(tmp_path / "empty.db")).close()
+    router = ReplicaRouter([f"sqlite:///{tmp_path / 'empty.db'}"])
+    assert router.status()[0]["healthy"] is False
+    assert router.choose() is None
+
+
+def test_reads_use_a_healthy_replica_and_fall_back_to_the_primary(app, db, tmp_path, replica_app):
+    db.session.add(QueryHistory(natural_query="on primary", generated_sql="SELECT 1;", database_type="sqlite"))
+    db.session.commit()
+    primary_path = db.engine.url.database
+
+    # Replica copied before the write below, so it lags one row behind
+    replica_path = str(tmp_path / "replica.db")
+    shutil.copy(primary_path, replica_path)
+    db.session.add(QueryHistory(natural_query="not replicated", generated_sql="SELECT 2;", database_type="sqlite"))
+    db.session.commit()
+
+    with replica_app(replica_path).test_client() as client:
+        rows = client.get("/api/history").get_json()["queries"]
+        assert [row["natural_query"] for row in rows] == ["on primary"]
+
+    empty_path = str(tmp_path / "empty.db")
+    sqlite3.connect(empty_path).close()
+    with replica_app(empty_path).test_client() as client:
+        assert client.get("/api/health").get_json()["read_replicas"][0]["healthy"] is False
+        response = client.get("/api/history")
+        assert response.status_code == 200
+        assert len(response.get_json()["queries"]) == 2
+
+
+def test_cross_origin_write_pins_reads_to_the_primary(app, db, tmp_path, replica_app):
+    db.session.add(QueryHistory(natural_query="toggled", generated_sql="SELECT 1;", database_type="sqlite"))
+    db.session.commit()
+    replica_path = str(tmp_path / "replica.db")
+    shutil.copy(db.engine.url.database, replica_path)
+
+    origin = {"Origin": "https://sqlsense.vercel.app"}
+    with replica_app(replica_path).test_client() as client:
+        response = client.post("/api/save", json={"type": "query", "query_id": 1, "is_favorite": True}, headers=origin)
+        assert response.status_code == 200
+        assert response.headers["Access-Control-Allow-Origin"] == origin["Origin"]
+        assert response.headers["Access-Control-Allow-Credentials"] == "true"
+        cookie = response.headers["Set-Cookie"]
+        assert "SameSite=None" in cookie and "Secure" in cookie
+
+        # The replica still has the old value; the pinned read must not see it
+        rows = client.get("/api/history", headers=origin).get_json()["queries"]
+        assert rows[0]["is_favorite"] is True
+
+    with replica_app(replica_path).test_client() as other_client:
+        rows = other_client.get("/api/history", headers=origin).get_json()["queries"]
+        assert rows[0]["is_favorite"] is False
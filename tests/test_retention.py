@@ -0,0 +1,85 @@
+import gzip
+from datetime import datetime, timedelta
+from models import QueryHistory, QueryVersion, AnalyticsEvent, AnalyticsRollup
+from services.retention import RetentionManager
+
+OLD = datetime.utcnow() - timedelta(days=400)
+CUTOFF = datetime.utcnow() - timedelta(days=365)
+
+
+def _history(db, prompt, favorite=False, created_at=OLD):
+    query = QueryHistory(natural_query=prompt, generated_sql="SELECT 1;", database_type="sqlite",
+                         is_favorite=favorite, created_at=created_at)
+    db.session.add(query)
+    db.session.flush()
+    return query
+
+
+def test_segment_append_and_read(tmp_path):
+    manager = RetentionManager(archive_dir=str(tmp_path))
+    path = manager._segment_path("chat_messages", datetime(2024, 1, 1))
+    manager._append(path, [{"id": 1, "message": "a"}, {"id": 2, "message": "b"}])
+    # A batch archived twice after a crash shows up once
+    manager._append(path, [{"id": 2, "message": "b"}, {"id": 3, "message": "c"}])
+
+    newer = manager._segment_path("chat_messages", datetime(2024, 2, 1))
+    manager._append(newer, [{"id": 4, "message": "d"}])
+    with open(newer, "ab") as handle:
+        handle.write(gzip.compress(b'{"id": 5}\n')[:10])
+
+    rows = list(manager.read_archive("chat_messages"))
+    assert [row["id"] for row in rows] == [4, 1, 2, 3]
+    assert [row["id"] for row in manager.read_archive("chat_messages", search="c")] == [3]
+
+
+def test_history_archive_keeps_favorites_and_recently_versioned_rows(db, tmp_path):
+    stale = _history(db, "stale")
+    favorite = _history(db, "favorite", favorite=True)
+    versioned = _history(db, "versioned")
+    fresh = _history(db, "fresh", created_at=datetime.utcnow())
+    db.session.add(QueryVersion(query_history_id=stale.id, generated_sql="SELECT 2;", created_at=OLD))
+    db.session.add(QueryVersion(query_history_id=versioned.id, generated_sql="SELECT 3;", created_at=datetime.utcnow()))
+    db.session.add(AnalyticsEvent(event_type="generate_sql", query_history_id=stale.id, created_at=datetime.utcnow()))
+    db.session.commit()
+    stale_id = stale.id
+
+    manager = RetentionManager(archive_dir=str(tmp_path), batch_size=1)
+    assert manager.archive_table("query_history", CUTOFF, dry_run=True)["eligible"] == 1
+    assert manager.archive_table("query_history", CUTOFF)["archived"] == 1
+
+    remaining = {query.natural_query for query in QueryHistory.query.all()}
+    assert remaining == {favorite.natural_query, versioned.natural_query, fresh.natural_query}
+    assert QueryVersion.query.filter_by(query_history_id=stale_id).count() == 0
+    assert AnalyticsEvent.query.one().query_history_id is None
+
+    archived = list(manager.read_archive("query_history"))
+    assert [row["id"] for row in archived] == [stale_id]
+    assert [version["generated_sql"] for version in archived[0]["versions"]] == ["SELECT 2;"]
+
+    RetentionManager(archive_dir=str(tmp_path), keep_favorites=False).archive_table("query_history", CUTOFF)
+    assert {query.natural_query for query in QueryHistory.query.all()} == {"versioned", "fresh"}
+
+
+def test_analytics_archive_rolls_up_counts(db, tmp_path):
+    for _ in range(3):
+        db.session.add(AnalyticsEvent(event_type="chat", created_at=OLD))
+    db.session.commit()
+
+    RetentionManager(archive_dir=str(tmp_path), batch_size=2).archive_table("analytics_events", CUTOFF)
+    assert AnalyticsEvent.query.count() == 0
+    rollup = AnalyticsRollup.query.one()
+    assert (rollup.day, rollup.event_type, rollup.count) == (OLD.date(), "chat", 3)
+
+
+def test_default_archive_dir_is_under_the_instance_folder(app, monkeypatch):
+    monkeypatch.delenv("ARCHIVE_DIR", raising=False)
+    assert RetentionManager().archive_dir == f"{app.instance_path}/archive"
+    monkeypatch.setenv("ARCHIVE_DIR", "/srv/archive")
+    assert RetentionManager().archive_dir == "/srv/archive"
+
+
+def test_archive_search_matches_non_ascii_text(tmp_path):
+    manager = RetentionManager(archive_dir=str(tmp_path))
+    manager._append(manager._segment_path("chat_messages", datetime(2024, 1, 1)),
+                    [{"id": 1, "message": "Clientes de São Paulo"}, {"id": 2, "message": "Orders"}])
+    assert [row["id"] for row in manager.read_archive("chat_messages", search="são")] == [1]
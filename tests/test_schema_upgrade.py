@@ -0,0 +1,38 @@
+import sqlite3
+from sqlalchemy import inspect
+
+# chat_messages as created before chat sessions existed
+OLD_CHAT_MESSAGES = """
+CREATE TABLE chat_messages (
+    id INTEGER NOT NULL PRIMARY KEY,
+    message TEXT NOT NULL,
+    response TEXT NOT NULL,
+    message_type VARCHAR(50),
+    created_at DATETIME
+)
+"""
+
+
+def test_init_db_adds_new_columns_and_indexes_to_existing_tables(tmp_path, monkeypatch):
+    path = tmp_path / "old.db"
+    with sqlite3.connect(path) as connection:
+        connection.execute(OLD_CHAT_MESSAGES)
+        connection.execute("INSERT INTO chat_messages (message, response) VALUES ('hi', 'hello')")
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{path}")
+
+    from app import create_app, db, init_db
+
+    app = create_app()
+    changes = init_db(app)
+    assert "added column chat_messages.session_id" in changes
+    assert "created index ix_chat_messages_session_id_id" in changes
+    assert init_db(app) == []
+
+    with app.app_context():
+        inspector = inspect(db.engine)
+        assert "session_id" in {column["name"] for column in inspector.get_columns("chat_messages")}
+        assert "ix_chat_messages_created_at" in {index["name"] for index in inspector.get_indexes("chat_messages")}
+        response = app.test_client().get("/api/chat/history")
+        assert response.status_code == 200
+        assert response.get_json()[0]["session_id"] is None
+        db.engine.dispose()